@@ -0,0 +1,89 @@
+"""
+[Fast JSON microbenchmark]
+1) Serializes a 5k row customer list, as returned by GET /api/customers
+2) Compares FastAPI's default response_model path, a precompiled TypeAdapter,
+   and the TrustedAdapter fast path (see app/utils/fast_json.py)
+
+Run from the project root: python .scripts/bench_fast_json.py
+"""
+
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pydantic import TypeAdapter
+
+from app.models.customer import CustomerResponse
+from app.utils.fast_json import TrustedAdapter, orjson
+
+ROWS = 5000
+REPEAT = 5
+NUMBER = 10
+
+
+def make_rows(count: int) -> list[dict]:
+    # Shaped like PostgREST rows of the customers table
+    return [
+        {
+            "id": i,
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "email": f"customer{i}@example.com",
+            "phone": f"+65 9{i:07d}",
+            "birthday": "1990-01-01" if i % 2 else None,
+            "membership_type": None,
+            "membership_status": "Active",
+            "preferred_therapist_id": None,
+            "preferred_outlet_id": 1,
+            "allergies": ["Nuts"] if i % 5 == 0 else [],
+            "reminders": "Email + SMS",
+            "credit_balance": i % 20,
+            "created_at": "2025-01-01T08:30:00.123456+00:00",
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def main():
+    rows = make_rows(ROWS)
+    adapter = TypeAdapter(list[CustomerResponse])
+    trusted = TrustedAdapter(CustomerResponse)
+
+    # What FastAPI does with response_model: validate, to JSON-able python, json module
+    def fastapi_default():
+        models = adapter.validate_python(rows)
+        return json.dumps(
+            adapter.dump_python(models, mode="json", by_alias=True),
+            separators=(",", ":"),
+        ).encode()
+
+    def precompiled_adapter():
+        return adapter.dump_json(adapter.validate_python(rows), by_alias=True)
+
+    def trusted_adapter():
+        return trusted.dump_json(trusted.validate_python(rows))
+
+    # Same body either way (keys, values and timestamp format)
+    assert trusted_adapter() == precompiled_adapter()
+
+    print(f"{ROWS} customers, best of {REPEAT} x {NUMBER} runs")
+    print(
+        f"encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}\n"
+    )
+
+    baseline = None
+    for name, fn in [
+        ("fastapi default", fastapi_default),
+        ("precompiled TypeAdapter", precompiled_adapter),
+        ("TrustedAdapter", trusted_adapter),
+    ]:
+        best = min(timeit.repeat(fn, repeat=REPEAT, number=NUMBER)) / NUMBER
+        baseline = baseline or best
+        print(f"{name:<25} {best * 1000:8.2f} ms  ({baseline / best:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+[Compression benchmark]
+1) Fetches the big list endpoints of a running server, with and without gzip
+2) Reports the bytes on the wire and the time per request for both
+
+Run from the project root, against a local (or deployed) server:
+BASE_URL=http://localhost:8080 DATE=2025-03-03 python .scripts/bench_gzip.py
+"""
+
+import os
+import time
+
+import httpx
+
+BASE_URL = os.environ.get("BASE_URL", "http://localhost:8080")
+DATE = os.environ.get("DATE", time.strftime("%Y-%m-%d"))
+REPEAT = int(os.environ.get("REPEAT", "10"))
+
+ENDPOINTS = [
+    "/api/customers",
+    "/api/services",
+    f"/api/appointments/outlet/1/{DATE}",
+]
+
+
+def measure(client: httpx.Client, path: str, encoding: str):
+    headers = {"Accept-Encoding": encoding}
+    best = float("inf")
+    wire_bytes = 0
+
+    for _ in range(REPEAT):
+        started_at = time.perf_counter()
+        with client.stream("GET", path, headers=headers) as response:
+            response.raise_for_status()
+            # Raw bytes, as they crossed the network (before decoding)
+            wire_bytes = sum(len(chunk) for chunk in response.iter_raw())
+        best = min(best, time.perf_counter() - started_at)
+
+    return wire_bytes, best
+
+
+def main():
+    print(f"{BASE_URL}, best of {REPEAT}\n")
+    print(f"{'endpoint':<40} {'identity':>12} {'gzip':>12} {'ratio':>7}")
+
+    with httpx.Client(base_url=BASE_URL, timeout=60) as client:
+        for path in ENDPOINTS:
+            plain_bytes, plain_time = measure(client, path, "identity")
+            gzip_bytes, gzip_time = measure(client, path, "gzip")
+
+            print(
+                f"{path:<40} {plain_bytes:>9} B {gzip_bytes:>9} B "
+                f"{plain_bytes / max(gzip_bytes, 1):>6.1f}x"
+            )
+            print(f"{'':<40} {plain_time * 1000:>9.1f} ms {gzip_time * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
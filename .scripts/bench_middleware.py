@@ -0,0 +1,92 @@
+"""
+[Middleware benchmark]
+1) Requests per second through a small FastAPI app, served in-process (no network)
+2) Before: the robots header as @app.middleware("http") (BaseHTTPMiddleware)
+3) After: robots, timing and request id as pure ASGI middleware (see app/middleware.py)
+
+Run from the project root: python .scripts/bench_middleware.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+from fastapi import FastAPI
+
+from app.middleware import (
+    RequestIdMiddleware,
+    RobotsHeaderMiddleware,
+    TimingMiddleware,
+)
+
+REQUESTS = 5000
+CONCURRENCY = 50
+
+
+def add_routes(app: FastAPI):
+    @app.get("/")
+    def welcome_screen():
+        return "Hello World!"
+
+
+def build_before() -> FastAPI:
+    app = FastAPI()
+    add_routes(app)
+
+    @app.middleware("http")
+    async def add_robot_headers(request, call_next):
+        response = await call_next(request)
+        response.headers["X-Robots-Tag"] = "noindex, nofollow"
+        return response
+
+    return app
+
+
+def build_after() -> FastAPI:
+    app = FastAPI()
+    add_routes(app)
+
+    app.add_middleware(RobotsHeaderMiddleware)
+    app.add_middleware(TimingMiddleware)
+    app.add_middleware(RequestIdMiddleware)
+    return app
+
+
+async def measure(app: FastAPI) -> float:
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        response = await client.get("/")
+        assert response.headers["X-Robots-Tag"] == "noindex, nofollow"
+
+        async def worker(count: int):
+            for _ in range(count):
+                await client.get("/")
+
+        started_at = time.perf_counter()
+        await asyncio.gather(
+            *(worker(REQUESTS // CONCURRENCY) for _ in range(CONCURRENCY))
+        )
+        return REQUESTS / (time.perf_counter() - started_at)
+
+
+async def main():
+    print(f"{REQUESTS} GET / requests, {CONCURRENCY} concurrent\n")
+
+    before = await measure(build_before())
+    after = await measure(build_after())
+
+    print(f"{'before (BaseHTTPMiddleware)':<30} {before:8.0f} req/s")
+    print(
+        f"{'after (pure ASGI, 3 layers)':<30} {after:8.0f} req/s  ({after / before:.2f}x)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,3 +4,12 @@ WEEKEND_OPENING = "10:00"
 
 WEEKDAY_CLOSING = "20:00"
 WEEKEND_CLOSING = "19:00"
+
+# Longest window (in days) for the from/to calendar range endpoints
+MAX_CALENDAR_RANGE_DAYS = 62
+
+# Granularity (in minutes) of the start times offered by the availability search
+AVAILABILITY_SLOT_MINUTES = 15
+
+# Most upserts + status changes accepted by one appointment batch
+MAX_APPOINTMENT_BATCH_SIZE = 100
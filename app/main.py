@@ -1,9 +1,22 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import PlainTextResponse
 
+from app.middleware import (
+    GZIP_COMPRESS_LEVEL,
+    GZIP_MINIMUM_SIZE,
+    RequestIdMiddleware,
+    RobotsHeaderMiddleware,
+    TimingMiddleware,
+)
 from app.routes.appointment.appointment import appointment_router
+from app.routes.availability import availability_router
+from app.routes.calendar import calendar_router
 from app.routes.customer import customer_router
+from app.routes.export import export_router
 from app.routes.outlet import outlet_router
 from app.routes.service.category import category_router
 from app.routes.service.category_color import category_color_router
@@ -12,19 +25,21 @@ from app.routes.staff.blocked_time import blocked_time_router
 from app.routes.staff.shift import shift_router
 from app.routes.staff.staff import staff_router
 from app.routes.staff.time_off import time_off_router
+from db.supabase import close_supabase_client, init_supabase_client
 
-app = FastAPI()
 
+# Open the shared supabase client on startup, release its pool on shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_supabase_client()
+    yield
+    await close_supabase_client()
 
-""" Guard against web crawlers (recursively follows links) """
 
+app = FastAPI(lifespan=lifespan)
 
-# Middleware to augment responses
-@app.middleware("http")
-async def add_robot_headers(request, call_next):
-    response = await call_next(request)
-    response.headers["X-Robots-Tag"] = "noindex, nofollow"
-    return response
+
+""" Guard against web crawlers (recursively follows links) """
 
 
 # Robots.txt file to tell search engine to restrict crawlers from URL access
@@ -49,8 +64,11 @@ app.include_router(blocked_time_router)
 
 # Router managing others
 app.include_router(appointment_router)
+app.include_router(calendar_router)
+app.include_router(availability_router)
 app.include_router(customer_router)
 app.include_router(outlet_router)
+app.include_router(export_router)
 
 
 # Test route
@@ -69,3 +87,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+
+# Middleware to augment responses (pure ASGI, see app/middleware.py)
+# The last one added runs first
+app.add_middleware(
+    GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL
+)
+app.add_middleware(RobotsHeaderMiddleware)
+app.add_middleware(TimingMiddleware)
+app.add_middleware(RequestIdMiddleware)
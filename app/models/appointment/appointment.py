@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import Field
 
@@ -54,6 +54,29 @@ class AppointmentUpsert(BaseSchema):
     status: AppointmentStatus
 
 
+"""
+    PUT
+    1) /api/appointments/batch
+"""
+
+
+class AppointmentBatchUpsert(AppointmentUpsert):
+    # Without an id, the appointment is created
+    id: Optional[int] = Field(None, gt=0)
+
+
+class AppointmentStatusChange(BaseSchema):
+    id: int = Field(..., gt=0)
+    status: AppointmentStatus
+
+
+class AppointmentBatch(BaseSchema):
+    upserts: List[AppointmentBatchUpsert] = Field(default_factory=list)
+    status_changes: List[AppointmentStatusChange] = Field(
+        default_factory=list, alias="statusChanges"
+    )
+
+
 """
     GET
     1) /api/appointments
@@ -0,0 +1,28 @@
+from typing import List
+
+from pydantic import Field
+
+from app.models._admin import BaseSchema
+
+
+class StaffAvailabilityResponse(BaseSchema):
+    staff_id: int = Field(..., gt=0, alias="staffId")
+    first_name: str = Field(..., alias="firstName")
+    last_name: str = Field(..., alias="lastName")
+
+    # HH:mm, in ascending order
+    start_times: List[str] = Field(..., alias="startTimes")
+
+
+"""
+    GET
+    1) /api/availability/outlet/:outlet_id/:date?service_id=
+"""
+
+
+class AvailabilityResponse(BaseSchema):
+    outlet_id: int = Field(..., gt=0, alias="outletId")
+    service_id: int = Field(..., gt=0, alias="serviceId")
+    date: str  # YYYY-MM-DD
+    duration: int = Field(..., gt=0)  # minutes
+    staffs: List[StaffAvailabilityResponse]
@@ -0,0 +1,36 @@
+from typing import List, Optional
+
+from pydantic import Field
+
+from app.models._admin import BaseSchema
+from app.models.appointment.appointment import AppointmentResponse
+from app.models.staff.blocked_time import BlockedTimeResponse
+from app.models.staff.shift import ShiftResponse
+from app.models.staff.staff import StaffWithoutLocationsResponse
+from app.models.staff.time_off import TimeOffResponse
+
+"""
+    Everything on the front desk calendar for one staff, on one date
+    1) No shift means the staff works the default business hours
+"""
+
+
+class StaffCalendarResponse(BaseSchema):
+    staff: StaffWithoutLocationsResponse
+    shift: Optional[ShiftResponse] = None
+
+    appointments: List[AppointmentResponse]
+    time_offs: List[TimeOffResponse] = Field(..., alias="timeOffs")
+    blocked_times: List[BlockedTimeResponse] = Field(..., alias="blockedTimes")
+
+
+"""
+    GET
+    1) /api/calendar/outlet/:outlet_id/:date
+"""
+
+
+class OutletCalendarResponse(BaseSchema):
+    outlet_id: int = Field(..., gt=0, alias="outletId")
+    date: str  # YYYY-MM-DD
+    staffs: List[StaffCalendarResponse]
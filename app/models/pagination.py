@@ -0,0 +1,18 @@
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic import Field
+
+from app.models._admin import BaseSchema
+
+T = TypeVar("T")
+
+"""
+    Returned by list endpoints when ?limit= or ?cursor= is given
+    1) Pass nextCursor back as ?cursor= for the following page
+    2) nextCursor is null on the last page
+"""
+
+
+class PageResponse(BaseSchema, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = Field(None, alias="nextCursor")
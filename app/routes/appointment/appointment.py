@@ -1,31 +1,53 @@
 import logging
-from typing import List, Optional
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from supabase import AClient
 
+from app.constants import MAX_APPOINTMENT_BATCH_SIZE
 from app.models.appointment.appointment import (
+    AppointmentBatch,
     AppointmentResponse,
     AppointmentStatus,
     AppointmentUpsert,
 )
 from app.models.customer import CustomerResponse
+from app.models.pagination import PageResponse
 from app.models.service.service import (
     ServiceWithoutLocationsResponse,
 )
 from app.utils.appointment import (
+    HasOverlappingCustomerAppointmentsArgs,
+    HasOverlappingStaffAppointmentsArgs,
     _get_appointments_by_outlet_and_date,
+    _has_overlapping_customer_appointments,
+    _has_overlapping_staff_appointments,
 )
+from app.utils.appointment_batch import _apply_appointment_batch
 from app.utils.blocked_time import (
     HasOverlappingBlockedTimeArgs,
     _has_overlapping_blocked_times,
 )
+from app.utils.credit_transaction import (
+    _delete_appointment_with_refund,
+    _upsert_appointment_with_credits,
+)
+from app.utils.fast_json import TrustedAdapter, json_response
+from app.utils.fields import _parse_fields
+from app.utils.general import run_concurrently
+from app.utils.idempotency import _run_idempotently
+from app.utils.pagination import MAX_PAGE_SIZE, _get_page
 from app.utils.shift import IsWithinStaffShiftArgs, _is_within_staff_shift
+from app.utils.staff import _get_staff
 from app.utils.time_off import HasOverlappingTimeOffsArgs, _has_overlapping_time_offs
 from db.supabase import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
+# Rows straight from the DB, served through the fast JSON path (see app/utils/fast_json.py)
+appointments_adapter = TrustedAdapter(AppointmentResponse)
+appointments_page_adapter = TrustedAdapter(AppointmentResponse, page=True)
+
 appointment_router = APIRouter(
     prefix="/api/appointments",
     tags=["appointments"],
@@ -37,17 +59,44 @@ appointment_router = APIRouter(
 
     1) I'll just write this once (@current maintainer)
     2) FastAPI, an async framework, requires supabase client as a dependency injection
-    3) This prevents weird timeouts and disconnects
+    3) The injected client is shared process-wide (see db/supabase.py)
+    4) Its pool keeps connections warm, and is rebuilt if it ever gets closed
 
 """
 
 
-@appointment_router.get("", response_model=List[AppointmentResponse])
-async def get_all_appointments(supabase: AClient = Depends(get_supabase_client)):
+# Paginated (by start time) when limit or cursor is given, otherwise everything
+@appointment_router.get(
+    "",
+    response_model=Union[List[AppointmentResponse], PageResponse[AppointmentResponse]],
+)
+async def get_all_appointments(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    supabase: AClient = Depends(get_supabase_client),
+):
+    # Sparse fieldset, eg: ?fields=startTime,endTime,staffId (see app/utils/fields.py)
+    fieldset = _parse_fields(AppointmentResponse, fields)
+    adapter, page_adapter = (
+        (fieldset.adapter, fieldset.page_adapter)
+        if fieldset
+        else (appointments_adapter, appointments_page_adapter)
+    )
+
     try:
-        appointments = await supabase.from_("appointments").select("*").execute()
-        return appointments.data
+        columns = fieldset.select("start_time") if fieldset else "*"
+        query = supabase.from_("appointments").select(columns)
+
+        if limit is not None or cursor is not None:
+            page = await _get_page(query, ("start_time", "id"), limit, cursor)
+            return json_response(page_adapter, page)
+
+        appointments = await query.execute()
+        return json_response(adapter, appointments.data)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching appointments: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to get all appointments")
@@ -57,16 +106,26 @@ async def get_all_appointments(supabase: AClient = Depends(get_supabase_client))
     "/outlet/{outlet_id}/{date}", response_model=List[AppointmentResponse]
 )
 async def get_appointments_by_outlet_and_date(
-    outlet_id: int, date: str, supabase: AClient = Depends(get_supabase_client)
+    outlet_id: int,
+    date: str,
+    fields: Optional[str] = None,
+    supabase: AClient = Depends(get_supabase_client),
 ):
     if outlet_id not in [1, 2]:
         raise HTTPException(status_code=400, detail="Invalid outlet id")
 
+    # eg: calendar tiles only need ?fields=staffId,startTime,endTime,status
+    fieldset = _parse_fields(AppointmentResponse, fields)
+
     try:
+        columns = fieldset.select() if fieldset else "*"
         appointments = await _get_appointments_by_outlet_and_date(
-            outlet_id, date, supabase
+            outlet_id, date, supabase, columns
+        )
+
+        return json_response(
+            fieldset.adapter if fieldset else appointments_adapter, appointments
         )
-        return appointments
 
     except Exception as e:
         logger.error(f"Error fetching outlet appointments: {str(e)}", exc_info=True)
@@ -103,7 +162,7 @@ async def get_single_appointment(
 
 
 # Update status
-@appointment_router.put("/status/{appointment_id}")
+@appointment_router.put("/status/{appointment_id}", response_model=AppointmentResponse)
 async def update_appointment_status(
     appointment_id: int,
     status: AppointmentStatus,  # Query param
@@ -120,7 +179,7 @@ async def update_appointment_status(
         if not response.data:
             raise HTTPException(status_code=404, detail="Appointment not found")
 
-        return "Appointment status successfully updated"
+        return response.data[0]
 
     except HTTPException:
         raise
@@ -134,17 +193,56 @@ async def update_appointment_status(
         )
 
 
+# Many upserts and status changes, all or nothing (eg: rescheduling a staff's day)
+@appointment_router.put("/batch", response_model=List[AppointmentResponse])
+async def batch_update_appointments(
+    batch: AppointmentBatch,
+    supabase: AClient = Depends(get_supabase_client),
+):
+    batch_size = len(batch.upserts) + len(batch.status_changes)
+
+    if batch_size == 0:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+
+    if batch_size > MAX_APPOINTMENT_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch exceeds {MAX_APPOINTMENT_BATCH_SIZE} changes",
+        )
+
+    try:
+        # Upserted, then status changed appointments, in batch order
+        return await _apply_appointment_batch(batch, supabase)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error applying appointment batch: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500, detail="Failed to update appointments in batch"
+        )
+
+
 # Create
-@appointment_router.put("", status_code=201)
+@appointment_router.put("", status_code=201, response_model=AppointmentResponse)
 async def create_appointment(
     appointment_data: AppointmentUpsert,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),  # Idempotency-Key
     supabase: AClient = Depends(get_supabase_client),
 ):
-    return await _upsert_appointment(None, appointment_data, supabase)
+    # Retries with the same key get the first result back (see app/utils/idempotency.py)
+    return await _run_idempotently(
+        idempotency_key,
+        "appointments",
+        appointment_data,
+        response,
+        lambda: _upsert_appointment(None, appointment_data, supabase),
+    )
 
 
 # Update
-@appointment_router.put("/{appointment_id}")
+@appointment_router.put("/{appointment_id}", response_model=AppointmentResponse)
 async def update_appointment(
     appointment_id: int,
     appointment_data: AppointmentUpsert,
@@ -167,15 +265,25 @@ async def _upsert_appointment(
 
     # Extract important info
     staff_id = appointment_data.staff_id
+    customer_id = appointment_data.customer_id
 
-    staff_response = (
-        await supabase.from_("staffs").select("*").eq("id", staff_id).single().execute()
+    # Staff (cached) and customer (for cross check 5) are fetched together
+    staff, customer_response = await run_concurrently(
+        _get_staff(staff_id, supabase),
+        supabase.from_("customers")
+        .select("*")
+        .eq("id", customer_id)
+        .single()
+        .execute(),
     )
 
-    staff = staff_response.data
     if not staff:
         raise HTTPException(status_code=404, detail="Staff not found")
 
+    customer: CustomerResponse = customer_response.data
+    if not customer:
+        raise HTTPException(status_code=404, detail="Customer not found")
+
     start_time = appointment_data.start_time
     end_time = appointment_data.end_time
 
@@ -185,28 +293,16 @@ async def _upsert_appointment(
     appointment_start_time = start_time.strftime("%H:%M")
     appointment_end_time = end_time.strftime("%H:%M")
 
-    # Extra info for cross check 5
-    customer_id = appointment_data.customer_id
-    customer: CustomerResponse = (
-        await supabase.from_("customers")
-        .select("*")
-        .eq("id", customer_id)
-        .single()
-        .execute()
-    ).data
-
-    if not customer:
-        raise HTTPException(status_code=404, detail="Customer not found")
-
     """ 
         [Cross check error handling]
         1) If cross check fails, it raises a HTTPException
         2) Hence, we just propogate the HTTPException back up 
+        3) The cross checks run concurrently, but the earliest failing check wins
     """
 
     try:
         # [CROSS CHECK 1]: Appointment falls within staff shift hours
-        args = IsWithinStaffShiftArgs(
+        shift_args = IsWithinStaffShiftArgs(
             staff_id=staff_id,
             staff=staff,
             date_string=date_string,
@@ -216,10 +312,8 @@ async def _upsert_appointment(
             type="Appointment",
         )
 
-        await _is_within_staff_shift(args, supabase)
-
         # [CROSS CHECK 2]: Appointment does not clash with time-offs
-        args = HasOverlappingTimeOffsArgs(
+        time_off_args = HasOverlappingTimeOffsArgs(
             staff_id=staff_id,
             staff=staff,
             date_string=date_string,
@@ -228,10 +322,8 @@ async def _upsert_appointment(
             type="Appointment",
         )
 
-        await _has_overlapping_time_offs(args, supabase)
-
         # [CROSS CHECK 3]: Appointment does not clash with blocked-times
-        args = HasOverlappingBlockedTimeArgs(
+        blocked_time_args = HasOverlappingBlockedTimeArgs(
             staff_id=staff_id,
             staff=staff,
             date_string=date_string,
@@ -240,43 +332,42 @@ async def _upsert_appointment(
             type="Appointment",
         )
 
-        await _has_overlapping_blocked_times(args, supabase)
-
-        # After passing the cross checks
-        # Then only do we perform the upsert
-
-        # Appointment start and end needs to be converted to ISO string
-        # To be JSON-serializable
-        payload["start_time"] = payload["start_time"].isoformat()
-        payload["end_time"] = payload["end_time"].isoformat()
+        # [CROSS CHECK 4]: Staff is not double booked
+        staff_appointment_args = HasOverlappingStaffAppointmentsArgs(
+            appointment_id=appointment_id,  # Exclude itself
+            staff_id=staff_id,
+            staff=staff,
+            date_string=date_string,
+            target_start_time=appointment_start_time,
+            target_end_time=appointment_end_time,
+            type="Appointment",
+        )
 
-        if not appointment_id:
-            # Create new appointment
-            payload["credits_paid"] = 0
-            response = await supabase.from_("appointments").insert(payload).execute()
-        else:
-            # Update existing appointment - don't include credits_paid
-            payload.pop("credits_paid", None)
-            response = (
-                await supabase.from_("appointments")
-                .update(payload)
-                .eq("id", appointment_id)
-                .execute()
-            )
+        # [CROSS CHECK 5]: Customer is not double booked
+        customer_appointment_args = HasOverlappingCustomerAppointmentsArgs(
+            appointment_id=appointment_id,  # Exclude itself
+            customer_id=customer_id,
+            customer=customer,
+            date_string=date_string,
+            target_start_time=appointment_start_time,
+            target_end_time=appointment_end_time,
+        )
 
-        if appointment_id and not response.data:
-            raise HTTPException(
-                status_code=404, detail="Appointment to be updated not found"
-            )
+        await run_concurrently(
+            _is_within_staff_shift(shift_args, supabase),
+            _has_overlapping_time_offs(time_off_args, supabase),
+            _has_overlapping_blocked_times(blocked_time_args, supabase),
+            _has_overlapping_staff_appointments(staff_appointment_args, supabase),
+            _has_overlapping_customer_appointments(customer_appointment_args, supabase),
+        )
 
-        # For both create and update intentions
-        target_appointment_id = response.data[0]["id"]
+        # After passing the cross checks
+        # Then only do we perform the upsert
 
         # Handle credit payment
         payment_method = appointment_data.payment_method
 
         if payment_method == "Credits":
-            # First, establish some basic info
             service_id = appointment_data.service_id
             service: ServiceWithoutLocationsResponse = (
                 await supabase.from_("services")
@@ -289,125 +380,24 @@ async def _upsert_appointment(
             if not service:
                 raise HTTPException(status_code=404, detail="Service not found")
 
-            current_cost = service["credit_cost"]
-            previous_credits_paid = response.data[0]["credits_paid"]
-            credit_diff = current_cost - previous_credits_paid
-
-            # Need to charge more
-            if credit_diff > 0:
-                # Insufficient funds
-                if customer["credit_balance"] < credit_diff:
-                    raise HTTPException(
-                        status_code=400,
-                        detail="Insufficient credits for updated appointment"
-                        if appointment_id
-                        else "Insufficient credits for new appointment",
-                    )
-
-                # Deduct credits
-                new_balance = customer["credit_balance"] - credit_diff
-
-                await (
-                    supabase.from_("customers")
-                    .update({"credit_balance": new_balance})
-                    .eq("id", customer["id"])
-                    .execute()
-                )
-
-                # Record deduction
-                transaction_info = {
-                    "customer_id": customer["id"],
-                    "appointment_id": target_appointment_id,
-                    "amount": -credit_diff,  # Negative for credits used
-                    "type": "usage",
-                    "description": f"Extra {credit_diff} credits used for updated appointment"
-                    if appointment_id
-                    else f"Used {current_cost} credits for new appointment",
-                }
-                await (
-                    supabase.from_("credit_transactions")
-                    .insert(transaction_info)
-                    .execute()
-                )
-
-            # Refund surplus credits
-            # ONLY possible on UPDATE
-            elif credit_diff < 0:
-                refund_amount = abs(credit_diff)
-                new_balance = customer["credit_balance"] + refund_amount
-
-                # Perform refund
-                await (
-                    supabase.from_("customers")
-                    .update({"credit_balance": new_balance})
-                    .eq("id", customer["id"])
-                    .execute()
-                )
-
-                # Record refund
-                transaction_info = {
-                    "customer_id": customer["id"],
-                    "appointment_id": appointment_id,
-                    "amount": refund_amount,  # Positive for credits added
-                    "type": "refund",
-                    "description": f"Refunded {refund_amount} credits after service change",
-                }
-                await (
-                    supabase.from_("credit_transactions")
-                    .insert(transaction_info)
-                    .execute()
-                )
-
-            # Update relevant fields
-            await (
-                supabase.from_("appointments")
-                .update({"credits_paid": current_cost, "payment_status": "Paid"})
-                .eq("id", target_appointment_id)
-                .execute()
+            # Charges (or refunds) the difference with what was already paid
+            payload["credits_paid"], payload["payment_status"] = (
+                service["credit_cost"],
+                "Paid",
             )
 
         else:
-            # Handle refund if switching from credits to cash/card
-            # ONLY possible on UPDATE
-            if appointment_id:
-                previous_credits_paid = response.data[0]["credits_paid"]
-                new_balance = customer["credit_balance"] + previous_credits_paid
-
-                # Perform refund
-                await (
-                    supabase.from_("customers")
-                    .update({"credit_balance": new_balance})
-                    .eq("id", customer["id"])
-                    .execute()
-                )
-
-                # Record refund
-                transaction_info = {
-                    "customer_id": customer["id"],
-                    "appointment_id": appointment_id,
-                    "amount": previous_credits_paid,
-                    "type": "refund",
-                    "description": f"Refunded {previous_credits_paid} credits after switching to card/cash payment",
-                }
-                await (
-                    supabase.from_("credit_transactions")
-                    .insert(transaction_info)
-                    .execute()
-                )
-
-            # Update relevant fields
-            await (
-                supabase.from_("appointments")
-                .update({"credits_paid": 0, "payment_status": "Pending"})
-                .eq("id", target_appointment_id)
-                .execute()
-            )
+            # Refunds any credits paid, if switching from credits to cash/card
+            payload["credits_paid"], payload["payment_status"] = 0, "Pending"
 
-        return (
-            "Appointment successfully updated"
-            if appointment_id
-            else "Appointment successfully created"
-        )
+        # Appointment start and end needs to be converted to ISO string
+        # To be JSON-serializable
+        payload["start_time"] = payload["start_time"].isoformat()
+        payload["end_time"] = payload["end_time"].isoformat()
+
+        # The write and the credit charge are one transaction (see db/credit_ledger.sql),
+        # so an appointment is never stored without its credits
+        return await _upsert_appointment_with_credits(payload, supabase)
 
     except HTTPException:
         raise
@@ -425,43 +415,14 @@ async def delete_appointment(
     appointment_id: int, supabase: AClient = Depends(get_supabase_client)
 ):
     try:
-        response = (
-            await supabase.from_("appointments")
-            .delete()
-            .eq("id", appointment_id)
-            .execute()
+        # Refunds the credits paid (if any) in the same transaction
+        deleted_appointment = await _delete_appointment_with_refund(
+            appointment_id, supabase
         )
 
-        if not response.data:
+        if not deleted_appointment:
             raise HTTPException(status_code=404, detail="Appointment not found")
 
-        # If customer paid by credits
-        # Refund the credits
-        deleted_appointment: AppointmentResponse = response.data[0]
-
-        payment_method = deleted_appointment["payment_method"]
-        credits_paid = deleted_appointment["credits_paid"]
-
-        customer_id = deleted_appointment["customer_id"]
-        customer: CustomerResponse = (
-            await supabase.from_("customers")
-            .select("*")
-            .eq("id", customer_id)
-            .single()
-            .execute()
-        ).data
-
-        if payment_method == "Credits" and credits_paid > 0:
-            # Perform the refund
-            new_credit_balance = customer["credit_balance"] + credits_paid
-
-            await (
-                supabase.from_("customers")
-                .update({"credit_balance": new_credit_balance})
-                .eq("id", customer_id)
-                .execute()
-            )
-
         return "Appointment successfully deleted"
 
     except HTTPException:
@@ -0,0 +1,118 @@
+import logging
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+from supabase import AClient
+
+from app.constants import AVAILABILITY_SLOT_MINUTES
+from app.models.availability import AvailabilityResponse
+from app.utils.appointment import _get_appointments_by_staffs_and_date
+from app.utils.blocked_time import _get_blocked_times_by_outlet_and_date
+from app.utils.general import run_concurrently, to_time_string
+from app.utils.occupancy import _build_staff_occupancies
+from app.utils.shift import _get_shifts_by_outlet_and_date
+from app.utils.staff import _get_staffs_by_outlet
+from app.utils.time_off import _get_time_offs_by_outlet_and_date
+from db.supabase import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+availability_router = APIRouter(
+    prefix="/api/availability",
+    tags=["availability"],
+)
+
+
+""" 
+    [Date format]
+    1) Dates are expected to be in YYYY-MM-DD format
+"""
+
+
+@availability_router.get(
+    "/outlet/{outlet_id}/{date}", response_model=AvailabilityResponse
+)
+async def get_availability_by_outlet_and_date(
+    outlet_id: int,
+    date: str,
+    service_id: int,  # Query param
+    supabase: AClient = Depends(get_supabase_client),
+):
+    if outlet_id not in [1, 2]:
+        raise HTTPException(status_code=400, detail="Invalid outlet id")
+
+    try:
+        is_weekday = 0 <= datetime.fromisoformat(date).weekday() <= 4
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+
+    try:
+        # Batch 1: who can take the booking, and for how long
+        staffs, service_response = await run_concurrently(
+            _get_staffs_by_outlet(outlet_id, supabase),
+            supabase.from_("services")
+            .select("*, service_outlet(outlet_id)")
+            .eq("id", service_id)
+            .maybe_single()
+            .execute(),
+        )
+
+        service = service_response.data if service_response is not None else None
+        if not service:
+            raise HTTPException(status_code=404, detail="Service not found")
+
+        service_locations = [item["outlet_id"] for item in service["service_outlet"]]
+        if outlet_id not in service_locations:
+            raise HTTPException(
+                status_code=400, detail="Service is not offered at this outlet"
+            )
+
+        bookable_staffs = [
+            staff for staff in staffs if staff["bookable"] and staff["active"]
+        ]
+        staff_ids = [staff["id"] for staff in bookable_staffs]
+
+        # Batch 2: everything already on their calendars
+        appointments, shifts, time_offs, blocked_times = await run_concurrently(
+            _get_appointments_by_staffs_and_date(staff_ids, date, supabase),
+            _get_shifts_by_outlet_and_date(outlet_id, date, supabase, staff_ids),
+            _get_time_offs_by_outlet_and_date(outlet_id, date, supabase, staff_ids),
+            _get_blocked_times_by_outlet_and_date(outlet_id, date, supabase, staff_ids),
+        )
+
+        # The rest is computed in memory
+        occupancies = _build_staff_occupancies(
+            staff_ids, is_weekday, shifts, appointments, time_offs, blocked_times
+        )
+
+        availability = []
+        for staff in bookable_staffs:
+            start_times = occupancies[staff["id"]].get_free_start_times(
+                service["duration"], AVAILABILITY_SLOT_MINUTES
+            )
+
+            availability.append(
+                {
+                    "staff_id": staff["id"],
+                    "first_name": staff["first_name"],
+                    "last_name": staff["last_name"],
+                    "start_times": [to_time_string(t) for t in start_times],
+                }
+            )
+
+        return {
+            "outlet_id": outlet_id,
+            "service_id": service_id,
+            "date": date,
+            "duration": service["duration"],
+            "staffs": availability,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(
+            f"Error fetching availability for outlet {outlet_id} over date {date}: {str(e)}",
+            exc_info=True,
+        )
+        raise HTTPException(status_code=500, detail="Failed to get outlet availability")
@@ -0,0 +1,89 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException
+from supabase import AClient
+
+from app.models.calendar import OutletCalendarResponse
+from app.utils.appointment import _get_appointments_by_outlet_and_date
+from app.utils.blocked_time import _get_blocked_times_by_outlet_and_date
+from app.utils.general import run_concurrently
+from app.utils.shift import _get_shifts_by_outlet_and_date
+from app.utils.staff import _get_staffs_by_outlet
+from app.utils.time_off import _get_time_offs_by_outlet_and_date
+from db.supabase import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+calendar_router = APIRouter(
+    prefix="/api/calendar",
+    tags=["calendar"],
+)
+
+
+""" 
+    [Date format]
+    1) Dates are expected to be in YYYY-MM-DD format
+"""
+
+
+@calendar_router.get(
+    "/outlet/{outlet_id}/{date}", response_model=OutletCalendarResponse
+)
+async def get_calendar_by_outlet_and_date(
+    outlet_id: int, date: str, supabase: AClient = Depends(get_supabase_client)
+):
+    if outlet_id not in [1, 2]:
+        raise HTTPException(status_code=400, detail="Invalid outlet id")
+
+    try:
+        # Resolve the outlet staffs ONCE
+        staffs = await _get_staffs_by_outlet(outlet_id, supabase)
+        staff_ids = [staff["id"] for staff in staffs]
+
+        # Then fetch every kind of calendar event together
+        appointments, shifts, time_offs, blocked_times = await run_concurrently(
+            _get_appointments_by_outlet_and_date(outlet_id, date, supabase),
+            _get_shifts_by_outlet_and_date(outlet_id, date, supabase, staff_ids),
+            _get_time_offs_by_outlet_and_date(outlet_id, date, supabase, staff_ids),
+            _get_blocked_times_by_outlet_and_date(outlet_id, date, supabase, staff_ids),
+        )
+
+        # Group everything by staff
+        calendar = {
+            staff["id"]: {
+                "staff": staff,
+                "shift": None,
+                "appointments": [],
+                "time_offs": [],
+                "blocked_times": [],
+            }
+            for staff in staffs
+        }
+
+        # At most one shift per staff per date
+        for shift in shifts:
+            calendar[shift["staff_id"]]["shift"] = shift
+
+        # Appointments of staffs no longer at the outlet have no column to go into
+        for appointment in appointments:
+            if appointment["staff_id"] in calendar:
+                calendar[appointment["staff_id"]]["appointments"].append(appointment)
+
+        for time_off in time_offs:
+            calendar[time_off["staff_id"]]["time_offs"].append(time_off)
+
+        for blocked_time in blocked_times:
+            calendar[blocked_time["staff_id"]]["blocked_times"].append(blocked_time)
+
+        return {
+            "outlet_id": outlet_id,
+            "date": date,
+            "staffs": list(calendar.values()),
+        }
+
+    except Exception as e:
+        logger.error(
+            f"Error fetching calendar for outlet {outlet_id} over date {date}: {str(e)}",
+            exc_info=True,
+        )
+        raise HTTPException(status_code=500, detail="Failed to get outlet calendar")
@@ -1,52 +1,122 @@
 import logging
-from typing import List, Optional
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from supabase import AClient
 
 from app.models.appointment.appointment import AppointmentResponse
 from app.models.customer import CustomerResponse, CustomerUpsert
+from app.models.pagination import PageResponse
+from app.utils.customer import DEFAULT_SEARCH_LIMIT, customer_search_index
+from app.utils.etag import etag_response
+from app.utils.fast_json import TrustedAdapter, json_response
+from app.utils.fields import _parse_fields
+from app.utils.idempotency import _run_idempotently
+from app.utils.pagination import MAX_PAGE_SIZE, _get_page
 from db.supabase import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
+# Rows straight from the DB, served through the fast JSON path (see app/utils/fast_json.py)
+customers_adapter = TrustedAdapter(CustomerResponse)
+customers_page_adapter = TrustedAdapter(CustomerResponse, page=True)
+appointments_adapter = TrustedAdapter(AppointmentResponse)
+appointments_page_adapter = TrustedAdapter(AppointmentResponse, page=True)
+
 customer_router = APIRouter(
     prefix="/api/customers",
     tags=["customers"],
 )
 
 
-@customer_router.get("", response_model=List[CustomerResponse])
-async def get_all_customers(supabase: AClient = Depends(get_supabase_client)):
+"""
+    [Pagination]
+    1) List routes take optional ?limit= and ?cursor= (see app/utils/pagination.py)
+    2) With either of them, the response is a page: { items, nextCursor }
+    3) Without both, the whole list is returned as before
+
+    [Sparse fieldsets]
+    1) List routes also take an optional ?fields= (see app/utils/fields.py)
+    2) eg: a customer dropdown only needs ?fields=id,firstName,lastName
+"""
+
+
+@customer_router.get(
+    "", response_model=Union[List[CustomerResponse], PageResponse[CustomerResponse]]
+)
+async def get_all_customers(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    supabase: AClient = Depends(get_supabase_client),
+):
+    fieldset = _parse_fields(CustomerResponse, fields)
+
+    adapter, page_adapter = (
+        (fieldset.adapter, fieldset.page_adapter)
+        if fieldset
+        else (customers_adapter, customers_page_adapter)
+    )
+
     try:
-        customers = await supabase.from_("customers").select("*").execute()
-        return customers.data
+        columns = fieldset.select() if fieldset else "*"
+        query = supabase.from_("customers").select(columns)
+
+        if limit is not None or cursor is not None:
+            page = await _get_page(query, ("id",), limit, cursor)
+            return etag_response(request, page_adapter, page)
+
+        customers = await query.execute()
+        return etag_response(request, adapter, customers.data)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching customers: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to get all customers")
 
 
-# Search over first name and last name
-@customer_router.get("/search", response_model=List[CustomerResponse])
+# Search over names, email and phone (see app/utils/customer.py)
+# Ranked, returns the top limit (default 20) matches
+@customer_router.get(
+    "/search",
+    response_model=Union[List[CustomerResponse], PageResponse[CustomerResponse]],
+)
 async def search_customers(
-    search_query: str | None = None, supabase: AClient = Depends(get_supabase_client)
+    search_query: str | None = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    supabase: AClient = Depends(get_supabase_client),
 ):
+    fieldset = _parse_fields(CustomerResponse, fields)
+    columns = fieldset.select() if fieldset else "*"
+    adapter, page_adapter = (
+        (fieldset.adapter, fieldset.page_adapter)
+        if fieldset
+        else (customers_adapter, customers_page_adapter)
+    )
+
     try:
         # No query or all whitespace query
         if not search_query or not search_query.strip():
-            customers = await supabase.from_("customers").select("*").execute()
-            return customers.data
+            query = supabase.from_("customers").select(columns)
 
-        lower_query = search_query.lower()
+            # Browsing every customer, paginated like get_all_customers
+            if limit is not None or cursor is not None:
+                page = await _get_page(query, ("id",), limit, cursor)
+                return json_response(page_adapter, page)
 
-        customers = (
-            await supabase.from_("customers")
-            .select("*")
-            .or_(f"first_name.ilike.%{lower_query}%,last_name.ilike.%{lower_query}%")
-            .execute()
+            customers = await query.execute()
+            return json_response(adapter, customers.data)
+
+        customers = await customer_search_index.search(
+            search_query, supabase, limit or DEFAULT_SEARCH_LIMIT, columns
         )
 
-        return customers.data
+        return json_response(adapter, customers)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(
             f"Error searching customers over query {search_query}': {str(e)}",
@@ -81,11 +151,23 @@ async def get_customer(
 
 
 @customer_router.get(
-    "/{customer_id}/appointments", response_model=List[AppointmentResponse]
+    "/{customer_id}/appointments",
+    response_model=Union[List[AppointmentResponse], PageResponse[AppointmentResponse]],
 )
 async def get_customer_appointments(
-    customer_id: int, supabase: AClient = Depends(get_supabase_client)
+    customer_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    supabase: AClient = Depends(get_supabase_client),
 ):
+    fieldset = _parse_fields(AppointmentResponse, fields)
+    adapter, page_adapter = (
+        (fieldset.adapter, fieldset.page_adapter)
+        if fieldset
+        else (appointments_adapter, appointments_page_adapter)
+    )
+
     try:
         target_customer = (
             await supabase.from_("customers")
@@ -98,14 +180,19 @@ async def get_customer_appointments(
         if not target_customer.data:
             raise HTTPException(status_code=404, detail="Customer not found")
 
-        target_customer_appointments = (
-            await supabase.from_("appointments")
-            .select("*")
+        columns = fieldset.select("start_time") if fieldset else "*"
+        query = (
+            supabase.from_("appointments")
+            .select(columns)
             .eq("customer_id", customer_id)
-            .execute()
         )
 
-        return target_customer_appointments.data
+        if limit is not None or cursor is not None:
+            page = await _get_page(query, ("start_time", "id"), limit, cursor)
+            return json_response(page_adapter, page)
+
+        target_customer_appointments = await query.execute()
+        return json_response(adapter, target_customer_appointments.data)
 
     except HTTPException:
         raise
@@ -120,15 +207,25 @@ async def get_customer_appointments(
 
 
 # Create
-@customer_router.put("", status_code=201)
+@customer_router.put("", status_code=201, response_model=CustomerResponse)
 async def create_customer(
-    customer_data: CustomerUpsert, supabase: AClient = Depends(get_supabase_client)
+    customer_data: CustomerUpsert,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),  # Idempotency-Key
+    supabase: AClient = Depends(get_supabase_client),
 ):
-    return await _upsert_customer(None, customer_data, supabase)
+    # Retries with the same key get the first result back (see app/utils/idempotency.py)
+    return await _run_idempotently(
+        idempotency_key,
+        "customers",
+        customer_data,
+        response,
+        lambda: _upsert_customer(None, customer_data, supabase),
+    )
 
 
 # Update
-@customer_router.put("/{customer_id}")
+@customer_router.put("/{customer_id}", response_model=CustomerResponse)
 async def update_customer(
     customer_id: int,
     customer_data: CustomerUpsert,
@@ -158,11 +255,10 @@ async def _upsert_customer(
                 status_code=404, detail="Customer to be updated not found"
             )
 
-        return (
-            "Customer successfully updated"
-            if customer_id
-            else "Customer successfully created"
-        )
+        customer_search_index.put(response.data[0])
+
+        # The stored row, with server-set fields (eg: id, created_at)
+        return response.data[0]
 
     except Exception as e:
         logger.error(f"Error upserting customer: {str(e)}", exc_info=True)
@@ -185,6 +281,8 @@ async def delete_customer(
         if not response.data:
             raise HTTPException(status_code=404, detail="Customer not found")
 
+        customer_search_index.remove(customer_id)
+
         return "Customer successfully deleted"
 
     except HTTPException:
@@ -1,14 +1,19 @@
 import logging
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import TypeAdapter
 from supabase import AClient
 
 from app.models.outlet import OutletResponse
+from app.utils.cache import reference_cache
+from app.utils.etag import etag_response
 from db.supabase import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
+outlets_adapter = TypeAdapter(List[OutletResponse])
+
 outlet_router = APIRouter(
     prefix="/api/outlets",
     tags=["outlets"],
@@ -16,10 +21,16 @@ outlet_router = APIRouter(
 
 
 @outlet_router.get("", response_model=List[OutletResponse])
-async def get_all_outlets(supabase: AClient = Depends(get_supabase_client)):
-    try:
+async def get_all_outlets(
+    request: Request, supabase: AClient = Depends(get_supabase_client)
+):
+    async def load_outlets():
         outlets = await supabase.from_("outlets").select("*").execute()
         return outlets.data
+
+    try:
+        outlets = await reference_cache.get_or_load(("outlets",), load_outlets)
+        return etag_response(request, outlets_adapter, outlets, memo_key="outlets")
     except Exception as e:
         # Log the error server-side
         # Give client a generic response (unless its something actionable)
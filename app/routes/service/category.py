@@ -1,7 +1,8 @@
 import logging
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import TypeAdapter
 from supabase import AClient
 
 from app.models.service.category import (
@@ -9,10 +10,14 @@ from app.models.service.category import (
     ServiceCategoryUpsert,
     ServiceCategoryWithCountResponse,
 )
+from app.utils.cache import reference_cache
+from app.utils.etag import etag_response
 from db.supabase import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
+categories_adapter = TypeAdapter(List[ServiceCategoryWithCountResponse])
+
 category_router = APIRouter(
     prefix="/api/service-categories",
     tags=["service-categories"],
@@ -20,8 +25,10 @@ category_router = APIRouter(
 
 
 @category_router.get("", response_model=List[ServiceCategoryWithCountResponse])
-async def get_all_categories(supabase: AClient = Depends(get_supabase_client)):
-    try:
+async def get_all_categories(
+    request: Request, supabase: AClient = Depends(get_supabase_client)
+):
+    async def load_categories():
         # LEFT JOIN with services FK table
         # GROUP BY service_category_id, then COUNT over each group
         # Each row is annotated with "services": [{"count": x}]
@@ -46,6 +53,14 @@ async def get_all_categories(supabase: AClient = Depends(get_supabase_client)):
 
         return categories
 
+    try:
+        categories = await reference_cache.get_or_load(
+            ("service_categories",), load_categories
+        )
+        return etag_response(
+            request, categories_adapter, categories, memo_key="service_categories"
+        )
+
     except Exception as e:
         logger.error(f"Error fetching service categories: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to get all categories")
@@ -87,7 +102,7 @@ async def get_single_category(
 
 
 # Create
-@category_router.put("", status_code=201)
+@category_router.put("", status_code=201, response_model=ServiceCategoryResponse)
 async def create_service_category(
     category_data: ServiceCategoryUpsert,
     supabase: AClient = Depends(get_supabase_client),
@@ -96,7 +111,7 @@ async def create_service_category(
 
 
 # Update
-@category_router.put("/{category_id}")
+@category_router.put("/{category_id}", response_model=ServiceCategoryResponse)
 async def update_service_category(
     category_id: int,
     category_data: ServiceCategoryUpsert,
@@ -123,11 +138,10 @@ async def _upsert_category(
                 status_code=404, detail="Category to be updated not found"
             )
 
-        return (
-            "Category successfully updated"
-            if category_id
-            else "Category successfully created"
-        )
+        reference_cache.invalidate("service_categories")
+
+        # The stored row, with server-set fields (eg: id, created_at)
+        return response.data[0]
 
     except Exception as e:
         logger.error(f"Error upserting category: {str(e)}", exc_info=True)
@@ -165,6 +179,8 @@ async def delete_category(category_id: int, supabase: AClient = Depends(get_supa
         if not response.data:
             raise HTTPException(status_code=404, detail="Category not found")
 
+        reference_cache.invalidate("service_categories")
+
         return "Category successfully deleted"
 
     except HTTPException:
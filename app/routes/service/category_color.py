@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from supabase import AClient
 
 from app.models.service.category_color import CategoryColorResponse
+from app.utils.cache import reference_cache
 from db.supabase import get_supabase_client
 
 logger = logging.getLogger(__name__)
@@ -17,11 +18,16 @@ category_color_router = APIRouter(
 
 @category_color_router.get("", response_model=List[CategoryColorResponse])
 async def get_all_category_colors(supabase: AClient = Depends(get_supabase_client)):
-    try:
+    async def load_category_colors():
         category_colors = (
             await supabase.from_("service_categories_colors").select("*").execute()
         )
         return category_colors.data
+
+    try:
+        return await reference_cache.get_or_load(
+            ("category_colors",), load_category_colors
+        )
     except Exception as e:
         logger.error(f"Error fetching category colors: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to get all category colors")
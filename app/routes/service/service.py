@@ -1,7 +1,8 @@
 import logging
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import TypeAdapter
 from supabase import AClient
 
 from app.models.service.service import (
@@ -9,10 +10,17 @@ from app.models.service.service import (
     ServiceWithLocationsResponse,
     ServiceWithoutLocationsResponse,
 )
+from app.utils.cache import reference_cache
+from app.utils.etag import etag_response
+from app.utils.general import run_concurrently
+from app.utils.outlet import _get_linked_outlet_ids, _update_outlet_links
 from db.supabase import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
+services_adapter = TypeAdapter(List[ServiceWithLocationsResponse])
+outlet_services_adapter = TypeAdapter(List[ServiceWithoutLocationsResponse])
+
 service_router = APIRouter(
     prefix="/api/services",
     tags=["services"],
@@ -20,8 +28,10 @@ service_router = APIRouter(
 
 
 @service_router.get("", response_model=List[ServiceWithLocationsResponse])
-async def get_all_services(supabase: AClient = Depends(get_supabase_client)):
-    try:
+async def get_all_services(
+    request: Request, supabase: AClient = Depends(get_supabase_client)
+):
+    async def load_services():
         # LEFT JOIN with service_outlet FK table
         # GROUP BY service_id, then grab all the outlet_ids
         # Each row is annotated with "service_outlet": [{"outlet_id": x}, ...]
@@ -42,6 +52,10 @@ async def get_all_services(supabase: AClient = Depends(get_supabase_client)):
 
         return services
 
+    try:
+        services = await reference_cache.get_or_load(("services",), load_services)
+        return etag_response(request, services_adapter, services, memo_key="services")
+
     except Exception as e:
         logger.error(f"Error fetching services: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to get all services")
@@ -51,12 +65,14 @@ async def get_all_services(supabase: AClient = Depends(get_supabase_client)):
     "/outlet/{outlet_id}", response_model=List[ServiceWithoutLocationsResponse]
 )
 async def get_all_services_from_outlet(
-    outlet_id: int, supabase: AClient = Depends(get_supabase_client)
+    outlet_id: int,
+    request: Request,
+    supabase: AClient = Depends(get_supabase_client),
 ):
     if outlet_id not in [1, 2]:
         raise HTTPException(status_code=400, detail="Invalid outlet id")
 
-    try:
+    async def load_outlet_services():
         response = (
             await supabase.from_("service_outlet")
             .select("service_id, services(*)")
@@ -68,6 +84,17 @@ async def get_all_services_from_outlet(
         services = [item["services"] for item in response.data]
         return services
 
+    try:
+        services = await reference_cache.get_or_load(
+            ("services", "outlet", outlet_id), load_outlet_services
+        )
+        return etag_response(
+            request,
+            outlet_services_adapter,
+            services,
+            memo_key=("services", "outlet", outlet_id),
+        )
+
     except Exception as e:
         logger.error(
             f"Error fetching services from outlet {outlet_id}: {str(e)}", exc_info=True
@@ -109,7 +136,7 @@ async def get_single_service(
 
 
 # Create
-@service_router.put("", status_code=201)
+@service_router.put("", status_code=201, response_model=ServiceWithLocationsResponse)
 async def create_service(
     service_data: ServiceUpsert, supabase: AClient = Depends(get_supabase_client)
 ):
@@ -117,7 +144,7 @@ async def create_service(
 
 
 # Update
-@service_router.put("/{service_id}")
+@service_router.put("/{service_id}", response_model=ServiceWithLocationsResponse)
 async def update_service(
     service_id: int,
     service_data: ServiceUpsert,
@@ -139,39 +166,35 @@ async def _upsert_service(
     locations: List[int] = payload.pop("locations")
 
     try:
-        response = await supabase.from_("services").upsert(payload).execute()
+        if service_id is not None:
+            # Current links are read alongside the update
+            response, current_locations = await run_concurrently(
+                supabase.from_("services").upsert(payload).execute(),
+                _get_linked_outlet_ids("service_outlet", service_id, supabase),
+            )
+        else:
+            response = await supabase.from_("services").upsert(payload).execute()
+            current_locations = []
 
         if service_id and not response.data:
             raise HTTPException(
                 status_code=404, detail="Service to be updated not found"
             )
 
-        # Clear existing links (if any)
-        if service_id is not None:
-            await (
-                supabase.from_("service_outlet")
-                .delete()
-                .eq("service_id", service_id)
-                .execute()
-            )
-
-        # Update the service-outlet link table
+        # Only the difference is applied to the service-outlet link table
         target_service = response.data[0]
         target_id: int = target_service["id"]
 
-        for outlet_id in locations:
-            await (
-                supabase.from_("service_outlet")
-                .insert({"service_id": target_id, "outlet_id": outlet_id})
-                .execute()
-            )
-
-        return (
-            "Service successfully updated"
-            if service_id
-            else "Service successfully created"
+        await _update_outlet_links(
+            "service_outlet", target_id, locations, current_locations, supabase
         )
 
+        # Service counts per category may have changed too
+        reference_cache.invalidate("services", "service_categories")
+
+        # The stored row, with its locations and server-set fields (eg: id)
+        return {**target_service, "locations": list(dict.fromkeys(locations))}
+
     except Exception as e:
         logger.error(f"Error upserting service: {str(e)}", exc_info=True)
 
@@ -207,6 +230,8 @@ async def delete_service(
         if not response.data:
             raise HTTPException(status_code=404, detail="Service not found")
 
+        reference_cache.invalidate("services", "service_categories")
+
         return "Service successfully deleted"
 
     except HTTPException:
@@ -1,17 +1,22 @@
 import logging
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from supabase import AClient
 
+from app.constants import MAX_CALENDAR_RANGE_DAYS
 from app.models.staff.blocked_time import BlockedTimeResponse, BlockedTimeUpsert
 from app.utils.blocked_time import (
     HasOverlappingBlockedTimeArgs,
     _get_blocked_times_by_outlet_and_date,
+    _get_blocked_times_by_outlet_and_range,
     _has_overlapping_blocked_times,
+    blocked_time_index,
 )
+from app.utils.general import run_concurrently
 from app.utils.shift import IsWithinStaffShiftArgs, _is_within_staff_shift
+from app.utils.staff import _get_staff
 from app.utils.time_off import HasOverlappingTimeOffsArgs, _has_overlapping_time_offs
 from db.supabase import get_supabase_client
 
@@ -46,6 +51,44 @@ async def get_blocked_times_for_outlet_and_date(
         )
 
 
+# Week/month views, keyed by YYYY-MM-DD (inclusive of both ends)
+@blocked_time_router.get(
+    "/outlet/{outlet_id}", response_model=Dict[str, List[BlockedTimeResponse]]
+)
+async def get_blocked_times_for_outlet_and_range(
+    outlet_id: int,
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    supabase: AClient = Depends(get_supabase_client),
+):
+    if outlet_id not in [1, 2]:
+        raise HTTPException(status_code=400, detail="Invalid outlet id")
+
+    if from_date > to_date:
+        raise HTTPException(status_code=400, detail="Invalid date range")
+
+    if (to_date - from_date).days + 1 > MAX_CALENDAR_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range cannot exceed {MAX_CALENDAR_RANGE_DAYS} days",
+        )
+
+    try:
+        result = await _get_blocked_times_by_outlet_and_range(
+            outlet_id, from_date, to_date, supabase
+        )
+        return result
+
+    except Exception as e:
+        logger.error(
+            f"Error fetching blocked times for outlet {outlet_id} over {from_date} to {to_date}: {str(e)}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=500, detail="Failed to get outlet blocked times"
+        )
+
+
 @blocked_time_router.get("/{blocked_time_id}", response_model=BlockedTimeResponse)
 async def get_single_blocked_time(
     blocked_time_id: int, supabase: AClient = Depends(get_supabase_client)
@@ -74,7 +117,7 @@ async def get_single_blocked_time(
 
 
 # Create
-@blocked_time_router.put("", status_code=201)
+@blocked_time_router.put("", status_code=201, response_model=BlockedTimeResponse)
 async def create_blocked_time(
     blocked_time_data: BlockedTimeUpsert,
     supabase: AClient = Depends(get_supabase_client),
@@ -83,7 +126,7 @@ async def create_blocked_time(
 
 
 # Update
-@blocked_time_router.put("/{blocked_time_id}")
+@blocked_time_router.put("/{blocked_time_id}", response_model=BlockedTimeResponse)
 async def update_blocked_time(
     blocked_time_id: int,
     blocked_time_data: BlockedTimeUpsert,
@@ -107,11 +150,7 @@ async def _upsert_blocked_time(
     # Extract important info
     staff_id = blocked_time_data.staff_id
 
-    staff_response = (
-        await supabase.from_("staffs").select("*").eq("id", staff_id).single().execute()
-    )
-
-    staff = staff_response.data
+    staff = await _get_staff(staff_id, supabase)
     if not staff:
         raise HTTPException(status_code=404, detail="Staff not found")
 
@@ -129,11 +168,12 @@ async def _upsert_blocked_time(
         [Cross check error handling]
         1) If cross check fails, it raises a HTTPException
         2) Hence, we just propogate the HTTPException back up 
+        3) The cross checks run concurrently, but the earliest failing check wins
     """
 
     try:
         # [CROSS CHECK 1]: Blocked time falls within staff shift hours
-        args = IsWithinStaffShiftArgs(
+        shift_args = IsWithinStaffShiftArgs(
             staff_id=staff_id,
             staff=staff,
             date_string=date_string,
@@ -143,10 +183,8 @@ async def _upsert_blocked_time(
             type="Blocked time",
         )
 
-        await _is_within_staff_shift(args, supabase)
-
         # [CROSS CHECK 2]: Blocked time does not clash with other blocked times
-        args = HasOverlappingBlockedTimeArgs(
+        blocked_time_args = HasOverlappingBlockedTimeArgs(
             staff_id=staff_id,
             staff=staff,
             date_string=date_string,
@@ -156,10 +194,8 @@ async def _upsert_blocked_time(
             blocked_time_id=blocked_time_id,  # Exclude itself
         )
 
-        await _has_overlapping_blocked_times(args, supabase)
-
         # [CROSS CHECK 3]: Blocked time does not clash with time offs
-        args = HasOverlappingTimeOffsArgs(
+        time_off_args = HasOverlappingTimeOffsArgs(
             staff_id=staff_id,
             staff=staff,
             date_string=date_string,
@@ -168,7 +204,11 @@ async def _upsert_blocked_time(
             type="Blocked time",
         )
 
-        await _has_overlapping_time_offs(args, supabase)
+        await run_concurrently(
+            _is_within_staff_shift(shift_args, supabase),
+            _has_overlapping_blocked_times(blocked_time_args, supabase),
+            _has_overlapping_time_offs(time_off_args, supabase),
+        )
 
         # After passing the cross checks
         # Then only do we perform the upsert
@@ -187,11 +227,11 @@ async def _upsert_blocked_time(
                 status_code=404, detail="Blocked time to be updated not found"
             )
 
-        return (
-            "Blocked time successfully updated"
-            if blocked_time_id
-            else "Blocked time successfully created"
-        )
+        # Keep the occurrence index in sync
+        blocked_time_index.put(response.data[0])
+
+        # The stored row, with server-set fields (eg: id, created_at)
+        return response.data[0]
 
     except HTTPException:
         raise
@@ -219,6 +259,8 @@ async def delete_blocked_time(
         if not response.data:
             raise HTTPException(status_code=404, detail="Blocked time not found")
 
+        blocked_time_index.remove(blocked_time_id)
+
         return "Blocked time successfully deleted"
 
     except HTTPException:
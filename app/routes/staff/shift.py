@@ -1,5 +1,4 @@
 import logging
-from datetime import datetime
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -7,8 +6,13 @@ from supabase import AClient
 
 from app.models.staff.shift import ShiftResponse, ShiftUpsert
 from app.utils.appointment import _get_appointments_by_staff_and_date
-from app.utils.blocked_time import _get_blocked_times_by_staff_and_date
-from app.utils.time_off import _get_time_offs_by_staff_and_date
+from app.utils.blocked_time import (
+    _get_blocked_time_range,
+    _get_blocked_times_by_staff_and_date,
+)
+from app.utils.general import TimeRange, run_concurrently
+from app.utils.shift import _get_shifts_by_outlet_and_date
+from app.utils.time_off import _get_time_off_range, _get_time_offs_by_staff_and_date
 from db.supabase import get_supabase_client
 
 logger = logging.getLogger(__name__)
@@ -62,25 +66,8 @@ async def get_shifts_by_outlet_and_date(
         raise HTTPException(status_code=400, detail="Invalid outlet id")
 
     try:
-        # First get staff IDs for the outlet
-        staff_response = (
-            await supabase.from_("staff_outlet")
-            .select("staff_id")
-            .eq("outlet_id", outlet_id)
-            .execute()
-        )
-        staff_ids = [s["staff_id"] for s in staff_response.data]
-
-        # Then get shifts for those staff on the date
-        shifts = (
-            await supabase.from_("shifts")
-            .select("*")
-            .in_("staff_id", staff_ids)
-            .eq("shift_date", date)
-            .execute()
-        )
-
-        return shifts.data
+        shifts = await _get_shifts_by_outlet_and_date(outlet_id, date, supabase)
+        return shifts
 
     except Exception as e:
         logger.error(
@@ -91,7 +78,7 @@ async def get_shifts_by_outlet_and_date(
 
 
 # Create
-@shift_router.put("", status_code=201)
+@shift_router.put("", status_code=201, response_model=ShiftResponse)
 async def create_shift(
     shift_data: ShiftUpsert, supabase: AClient = Depends(get_supabase_client)
 ):
@@ -99,7 +86,7 @@ async def create_shift(
 
 
 # Update
-@shift_router.put("/{shift_id}")
+@shift_router.put("/{shift_id}", response_model=ShiftResponse)
 async def update_shift(
     shift_id: int,
     shift_data: ShiftUpsert,
@@ -126,14 +113,25 @@ async def _upsert_shift(
     shift_end_time = shift_data.end_time
 
     try:
-        # [CROSS CHECK 1]: Shift does not cause any staff appointments to fall out of range
-        staff_appointments = await _get_appointments_by_staff_and_date(
-            shift_staff_id, shift_date, supabase
+        # Existing calendar events of the staff are fetched together
+        # The cross checks below still run in order, over the fetched data
+        (
+            staff_appointments,
+            staff_time_offs,
+            staff_blocked_times,
+        ) = await run_concurrently(
+            _get_appointments_by_staff_and_date(shift_staff_id, shift_date, supabase),
+            _get_time_offs_by_staff_and_date(shift_staff_id, shift_date, supabase),
+            _get_blocked_times_by_staff_and_date(shift_staff_id, shift_date, supabase),
         )
 
+        shift_range = TimeRange.from_times(shift_start_time, shift_end_time)
+
+        # [CROSS CHECK 1]: Shift does not cause any staff appointments to fall out of range
         is_all_within_range = all(
-            datetime.fromisoformat(appt["start_time"]).time() >= shift_start_time
-            and datetime.fromisoformat(appt["end_time"]).time() <= shift_end_time
+            shift_range.contains(
+                TimeRange.from_datetime_strings(appt["start_time"], appt["end_time"])
+            )
             for appt in staff_appointments
         )
 
@@ -143,13 +141,8 @@ async def _upsert_shift(
             )
 
         # [CROSS CHECK 2]: Shift does not cause any staff time offs to fall out of range
-        staff_time_offs = await _get_time_offs_by_staff_and_date(
-            shift_staff_id, shift_date, supabase
-        )
-
         is_all_within_range = all(
-            time_off["start_time"] >= shift_start_time.strftime("%H:%M")
-            and time_off["end_time"] <= shift_end_time.strftime("%H:%M")
+            shift_range.contains(_get_time_off_range(time_off))
             for time_off in staff_time_offs
         )
 
@@ -159,13 +152,8 @@ async def _upsert_shift(
             )
 
         # [CROSS CHECK 3]: Shift does not cause any staff blocked time to fall out of range
-        staff_blocked_times = await _get_blocked_times_by_staff_and_date(
-            shift_staff_id, shift_date, supabase
-        )
-
         is_all_within_range = all(
-            blocked_time["from_time"] >= shift_start_time.strftime("%H:%M")
-            and blocked_time["to_time"] <= shift_end_time.strftime("%H:%M")
+            shift_range.contains(_get_blocked_time_range(blocked_time))
             for blocked_time in staff_blocked_times
         )
 
@@ -182,9 +170,8 @@ async def _upsert_shift(
         if shift_id and not response.data:
             raise HTTPException(status_code=404, detail="Shift to be updated not found")
 
-        return (
-            "Shift successfully updated" if shift_id else "Shift successfully created"
-        )
+        # The stored row, with server-set fields (eg: id, created_at)
+        return response.data[0]
 
     except HTTPException:
         raise
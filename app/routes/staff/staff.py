@@ -1,7 +1,8 @@
 import logging
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import TypeAdapter
 from supabase import AClient
 
 from app.models.staff.staff import (
@@ -9,10 +10,24 @@ from app.models.staff.staff import (
     StaffWithLocationsResponse,
     StaffWithoutLocationsResponse,
 )
+from app.utils.blocked_time import blocked_time_index
+from app.utils.cache import reference_cache
+from app.utils.etag import etag_response
+from app.utils.fields import _parse_fields
+from app.utils.general import run_concurrently
+from app.utils.outlet import _get_linked_outlet_ids, _update_outlet_links
+from app.utils.staff import (
+    _get_staff,
+    _get_staff_directory,
+    _get_staffs_by_outlet,
+)
 from db.supabase import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
+staffs_adapter = TypeAdapter(List[StaffWithLocationsResponse])
+outlet_staffs_adapter = TypeAdapter(List[StaffWithoutLocationsResponse])
+
 staff_router = APIRouter(
     prefix="/api/staffs",
     tags=["staffs"],
@@ -20,26 +35,24 @@ staff_router = APIRouter(
 
 
 @staff_router.get("", response_model=List[StaffWithLocationsResponse])
-async def get_all_staffs(supabase: AClient = Depends(get_supabase_client)):
+async def get_all_staffs(
+    request: Request,
+    fields: Optional[str] = None,
+    supabase: AClient = Depends(get_supabase_client),
+):
+    # Staffs come from the cached directory, so ?fields= only trims the response
+    fieldset = _parse_fields(StaffWithLocationsResponse, fields)
+
     try:
-        # LEFT JOIN with staff_outlet FK table
-        # GROUP BY staff_id, then grab all the outlet_ids
-        # Each row is annotated with "staff_outlet": [{"outlet_id": x}, ...]
-        response = (
-            await supabase.from_("staffs").select("*, staff_outlet(outlet_id)").execute()
+        directory = await _get_staff_directory(supabase)
+        return etag_response(
+            request,
+            fieldset.adapter if fieldset else staffs_adapter,
+            list(directory.values()),
+            memo_key=("staffs", fieldset.columns) if fieldset else "staffs",
+            source=directory,
         )
 
-        # Process the response
-        staffs = []
-        for staff in response.data:
-            # Remove the annotation, replace with locations
-            staff["locations"] = [
-                item["outlet_id"] for item in staff.pop("staff_outlet", [])
-            ]
-            staffs.append(staff)
-
-        return staffs
-
     except Exception as e:
         logger.error(f"Error fetching staffs: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to get all staffs")
@@ -49,23 +62,27 @@ async def get_all_staffs(supabase: AClient = Depends(get_supabase_client)):
     "/outlet/{outlet_id}", response_model=List[StaffWithoutLocationsResponse]
 )
 async def get_all_staffs_from_outlet(
-    outlet_id: int, supabase: AClient = Depends(get_supabase_client)
+    outlet_id: int,
+    request: Request,
+    fields: Optional[str] = None,
+    supabase: AClient = Depends(get_supabase_client),
 ):
     if outlet_id not in [1, 2]:
         raise HTTPException(status_code=400, detail="Invalid outlet id")
 
+    fieldset = _parse_fields(StaffWithoutLocationsResponse, fields)
+
     try:
-        response = (
-            await supabase.from_("staff_outlet")
-            .select("staff_id, staffs(*)")
-            .eq("outlet_id", outlet_id)
-            .execute()
+        directory = await _get_staff_directory(supabase)
+        staffs = await _get_staffs_by_outlet(outlet_id, supabase)
+        return etag_response(
+            request,
+            fieldset.adapter if fieldset else outlet_staffs_adapter,
+            staffs,
+            memo_key=("staffs", "outlet", outlet_id, fieldset and fieldset.columns),
+            source=directory,
         )
 
-        # Extract staff data from the joined response
-        staffs = [item["staffs"] for item in response.data]
-        return staffs
-
     except Exception as e:
         logger.error(
             f"Error fetching staffs from outlet {outlet_id}: {str(e)}", exc_info=True
@@ -100,23 +117,11 @@ async def get_staff_stats(supabase: AClient = Depends(get_supabase_client)):
 @staff_router.get("/{staff_id}", response_model=StaffWithLocationsResponse)
 async def get_single_staff(staff_id: int, supabase: AClient = Depends(get_supabase_client)):
     try:
-        response = (
-            await supabase.from_("staffs")
-            .select("*, staff_outlet(outlet_id)")
-            .eq("id", staff_id)
-            .single()
-            .execute()
-        )
+        target_staff = await _get_staff(staff_id, supabase)
 
-        if not response.data:
+        if not target_staff:
             raise HTTPException(status_code=404, detail="Staff not found")
 
-        # Process the response
-        target_staff = response.data
-        target_staff["locations"] = [
-            item["outlet_id"] for item in target_staff.pop("staff_outlet", [])
-        ]
-
         return target_staff
 
     except HTTPException:
@@ -127,7 +132,7 @@ async def get_single_staff(staff_id: int, supabase: AClient = Depends(get_supaba
 
 
 # Create
-@staff_router.put("", status_code=201)
+@staff_router.put("", status_code=201, response_model=StaffWithLocationsResponse)
 async def create_staff(
     staff_data: StaffUpsert, supabase: AClient = Depends(get_supabase_client)
 ):
@@ -135,7 +140,7 @@ async def create_staff(
 
 
 # Update
-@staff_router.put("/{staff_id}")
+@staff_router.put("/{staff_id}", response_model=StaffWithLocationsResponse)
 async def update_staff(
     staff_id: int,
     staff_data: StaffUpsert,
@@ -155,28 +160,32 @@ async def _upsert_staff(staff_id: Optional[int], staff_data: StaffUpsert, supaba
     locations: List[int] = payload.pop("locations")
 
     try:
-        response = await supabase.from_("staffs").upsert(payload).execute()
+        if staff_id is not None:
+            # Current links are read alongside the update
+            response, current_locations = await run_concurrently(
+                supabase.from_("staffs").upsert(payload).execute(),
+                _get_linked_outlet_ids("staff_outlet", staff_id, supabase),
+            )
+        else:
+            response = await supabase.from_("staffs").upsert(payload).execute()
+            current_locations = []
 
         if staff_id and not response.data:
             raise HTTPException(status_code=404, detail="Staff to be updated not found")
 
-        # Clear existing links (if any)
-        if staff_id is not None:
-            await supabase.from_("staff_outlet").delete().eq("staff_id", staff_id).execute()
-
-        # Update the staff-outlet link table
+        # Only the difference is applied to the staff-outlet link table
         target_staff = response.data[0]
         target_id: int = target_staff["id"]
 
-        for outlet_id in locations:
-            await supabase.from_("staff_outlet").insert(
-                {"staff_id": target_id, "outlet_id": outlet_id}
-            ).execute()
-
-        return (
-            "Staff successfully updated" if staff_id else "Staff successfully created"
+        await _update_outlet_links(
+            "staff_outlet", target_id, locations, current_locations, supabase
         )
 
+        reference_cache.invalidate("staffs")
+
+        # The stored row, with its locations and server-set fields (eg: id)
+        return {**target_staff, "locations": list(dict.fromkeys(locations))}
+
     except Exception as e:
         logger.error(f"Error upserting staff: {str(e)}", exc_info=True)
 
@@ -192,6 +201,9 @@ async def delete_staff(staff_id: int, supabase: AClient = Depends(get_supabase_c
         if not response.data:
             raise HTTPException(status_code=404, detail="Staff not found")
 
+        reference_cache.invalidate("staffs")
+        blocked_time_index.drop_staff(staff_id)
+
         return "Staff successfully deleted"
 
     except HTTPException:
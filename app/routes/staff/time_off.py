@@ -1,19 +1,23 @@
 import logging
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from supabase import AClient
 
+from app.constants import MAX_CALENDAR_RANGE_DAYS
 from app.models.staff.time_off import TimeOffResponse, TimeOffUpsert
 from app.utils.blocked_time import (
     HasOverlappingBlockedTimeArgs,
     _has_overlapping_blocked_times,
 )
+from app.utils.general import run_concurrently
 from app.utils.shift import IsWithinStaffShiftArgs, _is_within_staff_shift
+from app.utils.staff import _get_staff
 from app.utils.time_off import (
     HasOverlappingTimeOffsArgs,
     _get_time_offs_by_outlet_and_date,
+    _get_time_offs_by_outlet_and_range,
     _has_overlapping_time_offs,
 )
 from db.supabase import get_supabase_client
@@ -45,6 +49,42 @@ async def get_time_offs_for_outlet_and_date(
         raise HTTPException(status_code=500, detail="Failed to get outlet time offs")
 
 
+# Week/month views, keyed by YYYY-MM-DD (inclusive of both ends)
+@time_off_router.get(
+    "/outlet/{outlet_id}", response_model=Dict[str, List[TimeOffResponse]]
+)
+async def get_time_offs_for_outlet_and_range(
+    outlet_id: int,
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    supabase: AClient = Depends(get_supabase_client),
+):
+    if outlet_id not in [1, 2]:
+        raise HTTPException(status_code=400, detail="Invalid outlet id")
+
+    if from_date > to_date:
+        raise HTTPException(status_code=400, detail="Invalid date range")
+
+    if (to_date - from_date).days + 1 > MAX_CALENDAR_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range cannot exceed {MAX_CALENDAR_RANGE_DAYS} days",
+        )
+
+    try:
+        result = await _get_time_offs_by_outlet_and_range(
+            outlet_id, from_date, to_date, supabase
+        )
+        return result
+
+    except Exception as e:
+        logger.error(
+            f"Error fetching time offs for outlet {outlet_id} over {from_date} to {to_date}: {str(e)}",
+            exc_info=True,
+        )
+        raise HTTPException(status_code=500, detail="Failed to get outlet time offs")
+
+
 @time_off_router.get("/{time_off_id}", response_model=TimeOffResponse)
 async def get_single_time_off(
     time_off_id: int, supabase: AClient = Depends(get_supabase_client)
@@ -71,7 +111,7 @@ async def get_single_time_off(
 
 
 # Create
-@time_off_router.put("", status_code=201)
+@time_off_router.put("", status_code=201, response_model=TimeOffResponse)
 async def create_time_off(
     time_off_data: TimeOffUpsert, supabase: AClient = Depends(get_supabase_client)
 ):
@@ -79,7 +119,7 @@ async def create_time_off(
 
 
 # Update
-@time_off_router.put("/{time_off_id}")
+@time_off_router.put("/{time_off_id}", response_model=TimeOffResponse)
 async def update_time_off(
     time_off_id: int,
     time_off_data: TimeOffUpsert,
@@ -101,11 +141,7 @@ async def _upsert_time_off(
     # Extract important info
     staff_id = time_off_data.staff_id
 
-    staff_response = (
-        await supabase.from_("staffs").select("*").eq("id", staff_id).single().execute()
-    )
-
-    staff = staff_response.data
+    staff = await _get_staff(staff_id, supabase)
     if not staff:
         raise HTTPException(status_code=404, detail="Staff not found")
 
@@ -123,11 +159,12 @@ async def _upsert_time_off(
         [Cross check error handling]
         1) If cross check fails, it raises a HTTPException
         2) Hence, we just propogate the HTTPException back up 
+        3) The cross checks run concurrently, but the earliest failing check wins
     """
 
     try:
         # [CROSS CHECK 1]: Time off falls within staff shift hours
-        args = IsWithinStaffShiftArgs(
+        shift_args = IsWithinStaffShiftArgs(
             staff_id=staff_id,
             staff=staff,
             date_string=date_string,
@@ -137,10 +174,8 @@ async def _upsert_time_off(
             type="Time off",
         )
 
-        await _is_within_staff_shift(args, supabase)
-
         # [CROSS CHECK 2]: Time off does not clash with blocked times
-        args = HasOverlappingBlockedTimeArgs(
+        blocked_time_args = HasOverlappingBlockedTimeArgs(
             staff_id=staff_id,
             staff=staff,
             date_string=date_string,
@@ -149,10 +184,8 @@ async def _upsert_time_off(
             type="Time off",
         )
 
-        await _has_overlapping_blocked_times(args, supabase)
-
         # [CROSS CHECK 3]: Time off does not clash with other time offs
-        args = HasOverlappingTimeOffsArgs(
+        time_off_args = HasOverlappingTimeOffsArgs(
             staff_id=staff_id,
             staff=staff,
             date_string=date_string,
@@ -162,7 +195,11 @@ async def _upsert_time_off(
             time_off_id=time_off_id,  # Exclude itself
         )
 
-        await _has_overlapping_time_offs(args, supabase)
+        await run_concurrently(
+            _is_within_staff_shift(shift_args, supabase),
+            _has_overlapping_blocked_times(blocked_time_args, supabase),
+            _has_overlapping_time_offs(time_off_args, supabase),
+        )
 
         # After passing the cross checks
         # Then only do we perform the upsert
@@ -181,11 +218,8 @@ async def _upsert_time_off(
                 status_code=404, detail="Time off to be updated not found"
             )
 
-        return (
-            "Time off successfully updated"
-            if time_off_id
-            else "Time off successfully created"
-        )
+        # The stored row, with server-set fields (eg: id, created_at)
+        return response.data[0]
 
     except HTTPException:
         raise
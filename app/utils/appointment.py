@@ -1,8 +1,12 @@
 from typing import List, Literal, Optional
 
+from fastapi import HTTPException
+from pydantic import BaseModel
 from supabase import AClient
 
 from app.models.appointment.appointment import AppointmentResponse
+from app.models.customer import CustomerResponse
+from app.models.staff.staff import StaffBase
 
 """ 
     [Date format]
@@ -23,13 +27,15 @@ async def _get_appointments_by_date(
     staff_id: Optional[int] = None,
     customer_id: Optional[int] = None,
     outlet_id: Optional[int] = None,
+    staff_ids: Optional[List[int]] = None,
+    columns: str = "*",
 ) -> List[AppointmentResponse]:
     start_of_day = f"{date}T00:00:00"
     end_of_day = f"{date}T23:59:59"
 
     query = (
         supabase.from_("appointments")
-        .select("*")
+        .select(columns)
         .gte("start_time", start_of_day)
         .lte("start_time", end_of_day)
     )
@@ -41,6 +47,8 @@ async def _get_appointments_by_date(
         query = query.eq("customer_id", customer_id)
     if outlet_id is not None:
         query = query.eq("outlet_id", outlet_id)
+    if staff_ids is not None:
+        query = query.in_("staff_id", staff_ids)
 
     # Only await the execute() call
     result = await query.execute()
@@ -59,100 +67,115 @@ async def _get_appointments_by_customer_and_date(
     return await _get_appointments_by_date(supabase, date, customer_id=customer_id)
 
 
+async def _get_appointments_by_staffs_and_date(
+    staff_ids: List[int], date: str, supabase: AClient
+) -> List[AppointmentResponse]:
+    return await _get_appointments_by_date(supabase, date, staff_ids=staff_ids)
+
+
 async def _get_appointments_by_outlet_and_date(
-    outlet_id: int, date: str, supabase: AClient
+    outlet_id: int, date: str, supabase: AClient, columns: str = "*"
 ) -> List[AppointmentResponse]:
-    return await _get_appointments_by_date(supabase, date, outlet_id=outlet_id)
+    return await _get_appointments_by_date(
+        supabase, date, outlet_id=outlet_id, columns=columns
+    )
 
 
 CalendarForms = Literal["Appointment", "Blocked time", "Time off", "Shift"]
 
 
-# class HasOverlappingStaffAppointmentsArgs(BaseModel):
-#     # Only required when appointment checking against itself
-#     appointment_id: Optional[int] = None
-#     staff_id: int
-#     staff: StaffBase
-#     date_string: str  # YYYY-MM-DD
-#     target_start_time: str  # HH:mm
-#     target_end_time: str  # HH:mm
-#     type: CalendarForms
-
-
-# async def _has_overlapping_staff_appointments(
-#     args: HasOverlappingStaffAppointmentsArgs, supabase: AClient
-# ) -> None:
-#     # Get apointments for the staff on the given date
-#     appointments = await _get_appointments_by_staff_and_date(
-#         args.staff_id, args.date_string, supabase
-#     )
-
-#     # Filter out the current appointment if appointment_id is provided
-#     staff_appointments = [
-#         appt
-#         for appt in appointments
-#         if not args.appointment_id or appt["id"] != args.appointment_id
-#     ]
-
-#     # Check for overlaps
-#     has_overlapping = any(
-#         has_overlap(
-#             datetime.fromisoformat(appt["start_time"]).strftime("%H:%M"),
-#             datetime.fromisoformat(appt["end_time"]).strftime("%H:%M"),
-#             args.target_start_time,
-#             args.target_end_time,
-#         )
-#         for appt in staff_appointments
-#     )
-
-#     if has_overlapping:
-#         raise HTTPException(
-#             status_code=400,
-#             detail=f"{args.type} {args.target_start_time}-{args.target_end_time} "
-#             f"by staff {args.staff.first_name} has clashing appointments.",
-#         )
-
-
-# class HasOverlappingCustomerAppointmentsArgs(BaseModel):
-#     # This is SOLELY USED by appointment to check against others
-#     appointment_id: Optional[int]
-#     customer_id: int
-#     customer: CustomerResponse
-#     date_string: str  # YYYY-MM-DD
-#     target_start_time: str  # HH:mm
-#     target_end_time: str  # HH:mm
-
-
-# async def _has_overlapping_customer_appointments(
-#     args: HasOverlappingCustomerAppointmentsArgs, supabase: AClient
-# ) -> None:
-#     # Get all appointments for the customer on the given date
-#     appointments = await _get_appointments_by_customer_and_date(
-#         args.customer_id, args.date_string, supabase
-#     )
-
-#     # Filter for customer appointments, excluding current appointment
-#     customer_appointments = [
-#         appt
-#         for appt in appointments
-#         if appt["customer_id"] == args.customer_id
-#         and (not args.appointment_id or appt["id"] != args.appointment_id)
-#     ]
-
-#     # Check for overlaps
-#     has_overlapping = any(
-#         has_overlap(
-#             datetime.fromisoformat(appt["start_time"]).strftime("%H:%M"),
-#             datetime.fromisoformat(appt["end_time"]).strftime("%H:%M"),
-#             args.target_start_time,
-#             args.target_end_time,
-#         )
-#         for appt in customer_appointments
-#     )
-
-#     if has_overlapping:
-#         raise HTTPException(
-#             status_code=400,
-#             detail=f"Appointment {args.target_start_time}-{args.target_end_time} "
-#             f"by customer {args.customer.first_name} has clashing appointments.",
-#         )
+"""
+    [Overlap as a range query]
+    1) Two appointments overlap iff start_time < other end AND end_time > other start
+    2) So PostgREST does the filtering, and at most one clashing id comes back
+    3) Cancelled appointments do not hold on to their slot
+"""
+
+
+async def _get_overlapping_appointment_ids(
+    supabase: AClient,
+    date_string: str,
+    target_start_time: str,
+    target_end_time: str,
+    exclude_appointment_id: Optional[int] = None,
+    staff_id: Optional[int] = None,
+    customer_id: Optional[int] = None,
+) -> List[int]:
+    query = (
+        supabase.from_("appointments")
+        .select("id")
+        .lt("start_time", f"{date_string}T{target_end_time}:00")
+        .gt("end_time", f"{date_string}T{target_start_time}:00")
+        .neq("status", "Cancelled")
+    )
+
+    if staff_id is not None:
+        query = query.eq("staff_id", staff_id)
+    if customer_id is not None:
+        query = query.eq("customer_id", customer_id)
+    if exclude_appointment_id is not None:
+        query = query.neq("id", exclude_appointment_id)
+
+    result = await query.limit(1).execute()
+    return [appt["id"] for appt in result.data]
+
+
+class HasOverlappingStaffAppointmentsArgs(BaseModel):
+    # Only required when appointment checking against itself
+    appointment_id: Optional[int] = None
+    staff_id: int
+    staff: StaffBase
+    date_string: str  # YYYY-MM-DD
+    target_start_time: str  # HH:mm
+    target_end_time: str  # HH:mm
+    type: CalendarForms
+
+
+async def _has_overlapping_staff_appointments(
+    args: HasOverlappingStaffAppointmentsArgs, supabase: AClient
+) -> None:
+    overlapping_ids = await _get_overlapping_appointment_ids(
+        supabase,
+        args.date_string,
+        args.target_start_time,
+        args.target_end_time,
+        exclude_appointment_id=args.appointment_id,
+        staff_id=args.staff_id,
+    )
+
+    if overlapping_ids:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{args.type} {args.target_start_time}-{args.target_end_time} "
+            f"by staff {args.staff.first_name} has clashing appointments.",
+        )
+
+
+class HasOverlappingCustomerAppointmentsArgs(BaseModel):
+    # This is SOLELY USED by appointment to check against others
+    appointment_id: Optional[int] = None
+    customer_id: int
+    customer: CustomerResponse
+    date_string: str  # YYYY-MM-DD
+    target_start_time: str  # HH:mm
+    target_end_time: str  # HH:mm
+
+
+async def _has_overlapping_customer_appointments(
+    args: HasOverlappingCustomerAppointmentsArgs, supabase: AClient
+) -> None:
+    overlapping_ids = await _get_overlapping_appointment_ids(
+        supabase,
+        args.date_string,
+        args.target_start_time,
+        args.target_end_time,
+        exclude_appointment_id=args.appointment_id,
+        customer_id=args.customer_id,
+    )
+
+    if overlapping_ids:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Appointment {args.target_start_time}-{args.target_end_time} "
+            f"by customer {args.customer.first_name} has clashing appointments.",
+        )
@@ -0,0 +1,357 @@
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+from fastapi import HTTPException
+from supabase import AClient
+
+from app.models.appointment.appointment import (
+    AppointmentBatch,
+    AppointmentResponse,
+)
+from app.models.customer import CustomerResponse
+from app.models.service.service import ServiceWithoutLocationsResponse
+from app.models.staff.staff import StaffWithLocationsResponse
+from app.utils.blocked_time import (
+    VALIDATION_MAX_AGE_SECONDS,
+    _get_blocked_time_range,
+    blocked_time_index,
+)
+from app.utils.general import TimeRange, run_concurrently, to_time_string
+from app.utils.occupancy import _interval_mask
+from app.utils.shift import _get_working_hours
+from app.utils.staff import _get_staff_directory
+from app.utils.time_off import (
+    _get_time_off_range,
+    _get_time_offs_by_staffs_and_range,
+)
+
+"""
+    [Appointment batches]
+    1) Every staff-day and customer-day the batch touches is loaded ONCE, in a handful of queries
+    2) Each change is then checked in memory (as bitmaps, see app/utils/occupancy.py),
+       against the calendar AND against the changes before it in the batch
+    3) Checks and error messages are the same as _upsert_appointment's cross checks,
+       prefixed with the change that failed (eg: "upserts[2]: ...")
+    4) The writes are applied by apply_appointment_batch (see db/appointment_batch.sql),
+       in one transaction, so either the whole batch is saved or none of it is
+"""
+
+
+class _StaffDay:
+    __slots__ = ("appointments", "blocked_times", "time_offs", "working")
+
+    def __init__(self, working_hours: TimeRange):
+        self.working = _interval_mask(working_hours)
+        self.time_offs = 0
+        self.blocked_times = 0
+        self.appointments = 0
+
+
+class _Target(NamedTuple):
+    # A change that (re)books a slot, so it goes through the cross checks
+    label: str  # eg: upserts[2]
+    staff_id: int
+    customer_id: int
+    date_string: str  # YYYY-MM-DD
+    time_range: TimeRange
+    is_cancelled: bool
+
+
+def _get_date_string_and_range(
+    start_time: datetime, end_time: datetime
+) -> Tuple[str, TimeRange]:
+    return start_time.date().isoformat(), TimeRange.from_times(start_time, end_time)
+
+
+async def _apply_appointment_batch(
+    batch: AppointmentBatch, supabase: AClient
+) -> List[AppointmentResponse]:
+    # Returns the stored appointments, upserts then status changes, in batch order
+    upsert_ids = [upsert.id for upsert in batch.upserts if upsert.id is not None]
+    status_change_ids = [change.id for change in batch.status_changes]
+    batch_ids = upsert_ids + status_change_ids
+
+    if len(set(batch_ids)) != len(batch_ids):
+        raise HTTPException(
+            status_code=400,
+            detail="Each appointment can only appear once in a batch",
+        )
+
+    # [LOAD 1]: The appointments being changed, the services charged in credits, and staffs
+    credit_service_ids = list(
+        {
+            upsert.service_id
+            for upsert in batch.upserts
+            if upsert.payment_method == "Credits"
+        }
+    )
+
+    existing_response, services_response, directory = await run_concurrently(
+        supabase.from_("appointments").select("*").in_("id", batch_ids).execute(),
+        supabase.from_("services").select("*").in_("id", credit_service_ids).execute(),
+        _get_staff_directory(supabase),
+    )
+
+    existing: Dict[int, AppointmentResponse] = {
+        appointment["id"]: appointment for appointment in existing_response.data
+    }
+    services: Dict[int, ServiceWithoutLocationsResponse] = {
+        service["id"]: service for service in services_response.data
+    }
+
+    for appointment_id in batch_ids:
+        if appointment_id not in existing:
+            raise HTTPException(
+                status_code=404, detail=f"Appointment {appointment_id} not found"
+            )
+
+    targets: List[_Target] = []
+
+    for index, upsert in enumerate(batch.upserts):
+        if upsert.staff_id not in directory:
+            raise HTTPException(status_code=404, detail="Staff not found")
+        if upsert.payment_method == "Credits" and upsert.service_id not in services:
+            raise HTTPException(status_code=404, detail="Service not found")
+
+        date_string, time_range = _get_date_string_and_range(
+            upsert.start_time, upsert.end_time
+        )
+        targets.append(
+            _Target(
+                f"upserts[{index}]",
+                upsert.staff_id,
+                upsert.customer_id,
+                date_string,
+                time_range,
+                upsert.status == "Cancelled",
+            )
+        )
+
+    # Status changes keep their slot, except un-cancelling, which books it again
+    kept: List[_Target] = []
+
+    for index, change in enumerate(batch.status_changes):
+        appointment = existing[change.id]
+        if change.status == "Cancelled":
+            continue
+
+        date_string, time_range = _get_date_string_and_range(
+            datetime.fromisoformat(appointment["start_time"]),
+            datetime.fromisoformat(appointment["end_time"]),
+        )
+        target = _Target(
+            f"statusChanges[{index}]",
+            appointment["staff_id"],
+            appointment["customer_id"],
+            date_string,
+            time_range,
+            False,
+        )
+
+        if appointment["status"] == "Cancelled":
+            targets.append(target)
+        else:
+            kept.append(target)
+
+    if targets:
+        await _check_targets(targets, kept, set(batch_ids), directory, supabase)
+
+    return await _write_appointment_batch(batch, services, supabase)
+
+
+async def _check_targets(
+    targets: List[_Target],
+    kept: List[_Target],
+    batch_ids: Set[int],
+    directory: Dict[int, StaffWithLocationsResponse],
+    supabase: AClient,
+) -> None:
+    staff_ids = sorted({target.staff_id for target in targets})
+    customer_ids = sorted({target.customer_id for target in targets})
+    dates = sorted({target.date_string for target in targets})
+    from_date, to_date = date.fromisoformat(dates[0]), date.fromisoformat(dates[-1])
+
+    # [LOAD 2]: Every affected staff-day and customer-day, across all dates at once
+    (
+        customers_response,
+        shifts_response,
+        time_offs_by_date,
+        appointments_response,
+        blocked_times_by_date,
+    ) = await run_concurrently(
+        supabase.from_("customers").select("*").in_("id", customer_ids).execute(),
+        supabase.from_("shifts")
+        .select("*")
+        .in_("staff_id", staff_ids)
+        .in_("shift_date", dates)
+        .execute(),
+        _get_time_offs_by_staffs_and_range(staff_ids, from_date, to_date, supabase),
+        supabase.from_("appointments")
+        .select("id, staff_id, customer_id, start_time, end_time")
+        .gte("start_time", f"{dates[0]}T00:00:00")
+        .lte("start_time", f"{dates[-1]}T23:59:59")
+        .neq("status", "Cancelled")
+        .or_(
+            f"staff_id.in.({','.join(map(str, staff_ids))}),"
+            f"customer_id.in.({','.join(map(str, customer_ids))})"
+        )
+        .execute(),
+        blocked_time_index.get_by_staffs_and_range(
+            staff_ids,
+            from_date,
+            to_date,
+            supabase,
+            max_age_seconds=VALIDATION_MAX_AGE_SECONDS,
+        ),
+    )
+
+    customers: Dict[int, CustomerResponse] = {
+        customer["id"]: customer for customer in customers_response.data
+    }
+    shift_by_staff_day = {
+        (shift["staff_id"], shift["shift_date"]): shift
+        for shift in shifts_response.data
+    }
+
+    staff_days: Dict[Tuple[int, str], _StaffDay] = {}
+    for target in targets:
+        key = (target.staff_id, target.date_string)
+        if key not in staff_days:
+            is_weekday = 0 <= date.fromisoformat(target.date_string).weekday() <= 4
+            staff_days[key] = _StaffDay(
+                _get_working_hours(shift_by_staff_day.get(key), is_weekday)
+            )
+
+    customer_days: Dict[Tuple[int, str], int] = defaultdict(int)
+
+    for date_string in dates:
+        for time_off in time_offs_by_date[date_string]:
+            staff_day = staff_days.get((time_off["staff_id"], date_string))
+            if staff_day:
+                staff_day.time_offs |= _interval_mask(_get_time_off_range(time_off))
+
+        for blocked_time in blocked_times_by_date[date_string]:
+            staff_day = staff_days.get((blocked_time["staff_id"], date_string))
+            if staff_day:
+                staff_day.blocked_times |= _interval_mask(
+                    _get_blocked_time_range(blocked_time)
+                )
+
+    # The calendar as it will be, apart from the targets (which are checked next)
+    booked = [
+        (
+            appointment["staff_id"],
+            appointment["customer_id"],
+            appointment["start_time"][:10],
+            TimeRange.from_datetime_strings(
+                appointment["start_time"], appointment["end_time"]
+            ),
+        )
+        for appointment in appointments_response.data
+        # Their state after the batch is what counts
+        if appointment["id"] not in batch_ids
+    ]
+    booked.extend(
+        (target.staff_id, target.customer_id, target.date_string, target.time_range)
+        for target in kept
+    )
+
+    for staff_id, customer_id, date_string, time_range in booked:
+        mask = _interval_mask(time_range)
+
+        staff_day = staff_days.get((staff_id, date_string))
+        if staff_day:
+            staff_day.appointments |= mask
+
+        customer_days[(customer_id, date_string)] |= mask
+
+    for target in targets:
+        customer = customers.get(target.customer_id)
+        if not customer:
+            raise HTTPException(status_code=404, detail="Customer not found")
+
+        # Un-cancelled appointments may belong to a staff deleted since
+        staff = directory.get(target.staff_id)
+        if not staff:
+            raise HTTPException(status_code=404, detail="Staff not found")
+
+        staff_day = staff_days[(target.staff_id, target.date_string)]
+        customer_key = (target.customer_id, target.date_string)
+        mask = _interval_mask(target.time_range)
+
+        prefix = (
+            f"{target.label}: Appointment "
+            f"{to_time_string(target.time_range.start)}-{to_time_string(target.time_range.end)}"
+        )
+
+        # Same order as the cross checks in _upsert_appointment
+        if staff_day.working & mask != mask:
+            detail = f"by staff {staff['first_name']} is outside shift hours."
+        elif staff_day.time_offs & mask:
+            detail = f"by staff {staff['first_name']} has clashing time offs."
+        elif staff_day.blocked_times & mask:
+            detail = f"by staff {staff['first_name']} has clashing blocked times."
+        elif staff_day.appointments & mask:
+            detail = f"by staff {staff['first_name']} has clashing appointments."
+        elif customer_days[customer_key] & mask:
+            detail = f"by customer {customer['first_name']} has clashing appointments."
+        else:
+            detail = None
+
+        if detail:
+            raise HTTPException(status_code=400, detail=f"{prefix} {detail}")
+
+        # Later changes in the batch are checked against this one
+        if not target.is_cancelled:
+            staff_day.appointments |= mask
+            customer_days[customer_key] |= mask
+
+
+async def _write_appointment_batch(
+    batch: AppointmentBatch,
+    services: Dict[int, ServiceWithoutLocationsResponse],
+    supabase: AClient,
+) -> List[AppointmentResponse]:
+    upserts = []
+    for upsert in batch.upserts:
+        # Unset fields (eg: notes) are left as they are on update
+        payload = upsert.model_dump(mode="json", exclude_unset=True, by_alias=False)
+
+        # Credits charged (or refunded) by the DB function, same as _upsert_appointment
+        if upsert.payment_method == "Credits":
+            payload["credits_paid"] = services[upsert.service_id]["credit_cost"]
+            payload["payment_status"] = "Paid"
+        else:
+            payload["credits_paid"] = 0
+            payload["payment_status"] = "Pending"
+
+        upserts.append(payload)
+
+    status_changes = [
+        change.model_dump(mode="json", by_alias=False)
+        for change in batch.status_changes
+    ]
+
+    result = (
+        await supabase.rpc(
+            "apply_appointment_batch",
+            {"p_upserts": upserts, "p_status_changes": status_changes},
+        ).execute()
+    ).data
+
+    error = result.get("error")
+
+    if error == "insufficient_credits":
+        index = result["index"]
+        action = "updated" if batch.upserts[index].id else "new"
+        raise HTTPException(
+            status_code=400,
+            detail=f"upserts[{index}]: Insufficient credits for {action} appointment",
+        )
+
+    if error == "appointment_not_found":
+        # Deleted after the batch was checked
+        raise HTTPException(status_code=404, detail="Appointment not found")
+
+    return result["appointments"]
@@ -1,6 +1,9 @@
+import os
+import time
 from calendar import monthrange
+from collections import defaultdict
 from datetime import date, datetime, timedelta
-from typing import List, Literal, Optional
+from typing import Dict, Iterator, List, Literal, Optional
 
 from dateutil.relativedelta import relativedelta
 from fastapi import HTTPException
@@ -9,7 +12,8 @@ from supabase import AClient
 
 from app.models.staff.blocked_time import BlockedTimeResponse, EndsType, FrequencyType
 from app.models.staff.staff import StaffBase
-from app.utils.general import has_overlap
+from app.utils.general import TimeRange, has_overlap
+from app.utils.staff import _get_staff_ids_by_outlet
 
 """ 
     [Date format]
@@ -20,38 +24,70 @@ from app.utils.general import has_overlap
 async def _get_blocked_times_by_staff_and_date(
     staff_id: int, date: str, supabase: AClient
 ) -> List[BlockedTimeResponse]:
-    all_blocked_times = (
-        await supabase.from_("blocked_times")
-        .select("*")
-        .eq("staff_id", staff_id)
-        .execute()
-    ).data
-
-    return _filter_by_frequency_and_ends_type(all_blocked_times, date)
+    # Only used by cross checks, which must not accept writes against stale rows
+    return await blocked_time_index.get_by_staffs_and_date(
+        [staff_id], date, supabase, max_age_seconds=VALIDATION_MAX_AGE_SECONDS
+    )
 
 
 async def _get_blocked_times_by_outlet_and_date(
-    outlet_id: int, date: str, supabase: AClient
+    outlet_id: int,
+    date: str,
+    supabase: AClient,
+    staff_ids: Optional[List[int]] = None,  # If the caller already resolved them
 ) -> List[BlockedTimeResponse]:
     # First, get staff IDs for the outlet
-    staff_ids_response = (
-        await supabase.from_("staff_outlet")
-        .select("staff_id")
-        .eq("outlet_id", outlet_id)
-        .execute()
-    ).data
-
-    staff_ids = [item["staff_id"] for item in staff_ids_response]
+    if staff_ids is None:
+        staff_ids = await _get_staff_ids_by_outlet(outlet_id, supabase)
 
     # Then, get blocked times for those staff
-    all_blocked_times = (
-        await supabase.from_("blocked_times")
-        .select("*")
-        .in_("staff_id", staff_ids)
-        .execute()
-    ).data
+    return await blocked_time_index.get_by_staffs_and_date(staff_ids, date, supabase)
+
+
+async def _get_blocked_times_by_outlet_and_range(
+    outlet_id: int,
+    from_date: date,
+    to_date: date,
+    supabase: AClient,
+    staff_ids: Optional[List[int]] = None,  # If the caller already resolved them
+) -> Dict[str, List[BlockedTimeResponse]]:
+    # First, get staff IDs for the outlet
+    if staff_ids is None:
+        staff_ids = await _get_staff_ids_by_outlet(outlet_id, supabase)
+
+    # Then, get blocked times for those staff, keyed by date
+    return await blocked_time_index.get_by_staffs_and_range(
+        staff_ids, from_date, to_date, supabase
+    )
+
+
+def _expand_blocked_times(
+    blocked_times: List[BlockedTimeResponse], from_date: date, to_date: date
+) -> Dict[str, List[BlockedTimeResponse]]:
+    """
+    Range version of _filter_by_frequency_and_ends_type.
+    Every date in [from_date, to_date] (inclusive) is keyed, even if it has no blocked times.
+
+    Each rule is expanded once over the whole window, instead of re-filtering per day.
+    """
+
+    by_date: Dict[str, List[BlockedTimeResponse]] = {
+        key: [] for key in _get_date_keys(from_date, to_date)
+    }
 
-    return _filter_by_frequency_and_ends_type(all_blocked_times, date)
+    for blocked_time in blocked_times:
+        for occurrence in _iter_occurrence_dates(blocked_time, from_date, to_date):
+            by_date[occurrence.isoformat()].append(blocked_time)
+
+    return by_date
+
+
+def _get_date_keys(from_date: date, to_date: date) -> List[str]:
+    # Every date in [from_date, to_date], as YYYY-MM-DD
+    num_days = (to_date - from_date).days + 1
+    return [
+        (from_date + timedelta(days=offset)).isoformat() for offset in range(num_days)
+    ]
 
 
 def _filter_by_frequency_and_ends_type(
@@ -137,17 +173,351 @@ def _is_date_in_range(
 def _is_date_in_occurrence_range(
     target_date: date, start_date: date, repeat_type: FrequencyType, occurrences: int
 ):
+    end_date = _get_last_occurrence_date(start_date, repeat_type, occurrences)
+
+    return _is_date_in_range(target_date, start_date, end_date, repeat_type)
+
+
+def _get_last_occurrence_date(
+    start_date: date, repeat_type: FrequencyType, occurrences: int
+) -> date:
     if repeat_type == "Daily":
-        end_date = start_date + timedelta(days=occurrences - 1)
+        return start_date + timedelta(days=occurrences - 1)
 
     elif repeat_type == "Weekly":
-        end_date = start_date + timedelta(weeks=occurrences - 1)
+        return start_date + timedelta(weeks=occurrences - 1)
 
     else:
         # Monthly
-        end_date = start_date + relativedelta(months=occurrences - 1)
+        return start_date + relativedelta(months=occurrences - 1)
 
-    return _is_date_in_range(target_date, start_date, end_date, repeat_type)
+
+def _iter_occurrence_dates(
+    blocked_time: BlockedTimeResponse, window_start: date, window_end: date
+) -> Iterator[date]:
+    """
+    Yield every date within [window_start, window_end] that the blocked time falls on.
+    Dates are computed by stepping through the rule, not by testing each day.
+    """
+
+    start_date = datetime.fromisoformat(blocked_time["start_date"]).date()
+
+    # Non-repeating blocked time
+    if blocked_time["frequency"] == "None":
+        if window_start <= start_date <= window_end:
+            yield start_date
+        return
+
+    # Repeating blocked time
+    repeat_type: FrequencyType = blocked_time["frequency"]
+    ends_type: EndsType = blocked_time["ends"]
+
+    if ends_type == "Never":
+        last_date = window_end
+
+    elif ends_type == "On date":
+        end_date = datetime.fromisoformat(blocked_time["ends_on_date"]).date()
+        last_date = min(window_end, end_date)
+
+    elif ends_type == "After":
+        occurrences = blocked_time["ends_after_occurrences"]
+        end_date = _get_last_occurrence_date(start_date, repeat_type, occurrences)
+        last_date = min(window_end, end_date)
+
+    else:
+        # Repeating without an ends type never matches (same as the date filter)
+        return
+
+    first_date = max(window_start, start_date)
+
+    if repeat_type == "Daily":
+        current = first_date
+        while current <= last_date:
+            yield current
+            current += timedelta(days=1)
+
+    elif repeat_type == "Weekly":
+        # Snap forward onto the start date's weekday
+        current = first_date + timedelta(
+            days=(start_date.weekday() - first_date.weekday()) % 7
+        )
+        while current <= last_date:
+            yield current
+            current += timedelta(weeks=1)
+
+    else:
+        # Monthly, clamped to the last day of shorter months (see above)
+        year, month = first_date.year, first_date.month
+        while True:
+            max_days = monthrange(year, month)[1]
+            current = date(year, month, min(start_date.day, max_days))
+
+            if current > last_date:
+                break
+            if current >= first_date:
+                yield current
+
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+"""
+    [Occurrence index]
+    1) Each staff's blocked times are loaded ONCE, then expanded into concrete dates
+    2) The expansion covers a rolling horizon around today, so a date lookup is a dict hit
+    3) Dates outside the horizon fall back to filtering the cached rows (still no query)
+    4) Blocked time upserts/deletes keep it up to date through put() and remove()
+    5) Entries also expire after a TTL, in case another worker process wrote to the table
+    6) Writes bump the staff's generation, so loads that raced a write are not stored
+    7) Cross checks pass a max age (VALIDATION_MAX_AGE_SECONDS, 0 by default),
+       so they read the DB instead of a copy up to INDEX_TTL_SECONDS old
+    8) Each row's TimeRange is computed once, when it is indexed (see _get_blocked_time_range)
+"""
+
+INDEX_PAST_DAYS = int(os.environ.get("BLOCKED_TIME_INDEX_PAST_DAYS", "31"))
+INDEX_FUTURE_DAYS = int(os.environ.get("BLOCKED_TIME_INDEX_FUTURE_DAYS", "180"))
+INDEX_TTL_SECONDS = float(os.environ.get("BLOCKED_TIME_INDEX_TTL_SECONDS", "300"))
+VALIDATION_MAX_AGE_SECONDS = float(
+    os.environ.get("BLOCKED_TIME_VALIDATION_MAX_AGE_SECONDS", "0")
+)
+
+
+def _to_time_range(blocked_time: BlockedTimeResponse) -> TimeRange:
+    return TimeRange.from_times(blocked_time["from_time"], blocked_time["to_time"])
+
+
+class _StaffOccurrences:
+    def __init__(self, blocked_times: List[BlockedTimeResponse]):
+        self.loaded_at = time.monotonic()
+        self.blocked_times: Dict[int, BlockedTimeResponse] = {
+            blocked_time["id"]: blocked_time for blocked_time in blocked_times
+        }
+        self.ranges: Dict[int, TimeRange] = {
+            blocked_time["id"]: _to_time_range(blocked_time)
+            for blocked_time in blocked_times
+        }
+        self.expand()
+
+    def expand(self) -> None:
+        today = datetime.now().date()
+
+        self.anchor = today
+        self.window_start = today - timedelta(days=INDEX_PAST_DAYS)
+        self.window_end = today + timedelta(days=INDEX_FUTURE_DAYS)
+        self.by_date: Dict[str, List[BlockedTimeResponse]] = defaultdict(list)
+
+        for blocked_time in self.blocked_times.values():
+            self._add(blocked_time)
+
+    def _add(self, blocked_time: BlockedTimeResponse) -> None:
+        for occurrence in _iter_occurrence_dates(
+            blocked_time, self.window_start, self.window_end
+        ):
+            self.by_date[occurrence.isoformat()].append(blocked_time)
+
+    def put(self, blocked_time: BlockedTimeResponse) -> None:
+        self.remove(blocked_time["id"])
+        self.blocked_times[blocked_time["id"]] = blocked_time
+        self.ranges[blocked_time["id"]] = _to_time_range(blocked_time)
+        self._add(blocked_time)
+
+    def remove(self, blocked_time_id: int) -> None:
+        if self.blocked_times.pop(blocked_time_id, None) is None:
+            return
+
+        self.ranges.pop(blocked_time_id, None)
+
+        for occurrence_date, blocked_times in list(self.by_date.items()):
+            self.by_date[occurrence_date] = [
+                bt for bt in blocked_times if bt["id"] != blocked_time_id
+            ]
+
+    def get(self, date_string: str) -> List[BlockedTimeResponse]:
+        self._roll()
+
+        if self.window_start.isoformat() <= date_string <= self.window_end.isoformat():
+            return list(self.by_date.get(date_string, []))
+
+        return _filter_by_frequency_and_ends_type(
+            list(self.blocked_times.values()), date_string
+        )
+
+    def get_range(
+        self, from_date: date, to_date: date
+    ) -> Dict[str, List[BlockedTimeResponse]]:
+        self._roll()
+
+        if self.window_start <= from_date and to_date <= self.window_end:
+            return {
+                key: list(self.by_date.get(key, []))
+                for key in _get_date_keys(from_date, to_date)
+            }
+
+        return _expand_blocked_times(
+            list(self.blocked_times.values()), from_date, to_date
+        )
+
+    def _roll(self) -> None:
+        # Roll the horizon forward once a day
+        if self.anchor != datetime.now().date():
+            self.expand()
+
+
+class BlockedTimeOccurrenceIndex:
+    def __init__(self):
+        self._staffs: Dict[int, _StaffOccurrences] = {}
+        self._staff_by_blocked_time: Dict[int, int] = {}
+
+        # Bumped on every write to a staff's blocked times, so loads that raced it are
+        # not stored (the epoch is for writes whose staff is not known, and clear())
+        self._generations: Dict[int, int] = {}
+        self._epoch = 0
+
+    async def get_by_staffs_and_date(
+        self,
+        staff_ids: List[int],
+        date_string: str,
+        supabase: AClient,
+        max_age_seconds: float = INDEX_TTL_SECONDS,
+    ) -> List[BlockedTimeResponse]:
+        staffs = await self._load(staff_ids, supabase, max_age_seconds)
+
+        result = []
+        for staff_id in staff_ids:
+            result.extend(staffs[staff_id].get(date_string))
+
+        return result
+
+    async def get_by_staffs_and_range(
+        self,
+        staff_ids: List[int],
+        from_date: date,
+        to_date: date,
+        supabase: AClient,
+        max_age_seconds: float = INDEX_TTL_SECONDS,
+    ) -> Dict[str, List[BlockedTimeResponse]]:
+        staffs = await self._load(staff_ids, supabase, max_age_seconds)
+
+        result: Dict[str, List[BlockedTimeResponse]] = {
+            key: [] for key in _get_date_keys(from_date, to_date)
+        }
+
+        for staff_id in staff_ids:
+            staff_range = staffs[staff_id].get_range(from_date, to_date)
+
+            for key, blocked_times in staff_range.items():
+                result[key].extend(blocked_times)
+
+        return result
+
+    async def _load(
+        self, staff_ids: List[int], supabase: AClient, max_age_seconds: float
+    ) -> Dict[int, _StaffOccurrences]:
+        # Returns the occurrences of every staff, loading those missing or too old
+        now = time.monotonic()
+        staffs = {staff_id: self._staffs.get(staff_id) for staff_id in staff_ids}
+        missing_ids = [
+            staff_id
+            for staff_id, occurrences in staffs.items()
+            if occurrences is None or now - occurrences.loaded_at >= max_age_seconds
+        ]
+
+        if not missing_ids:
+            return staffs
+
+        epoch = self._epoch
+        generations = {
+            staff_id: self._generations.get(staff_id, 0) for staff_id in missing_ids
+        }
+
+        # One query for every staff that is not indexed yet (or too old)
+        all_blocked_times = (
+            await supabase.from_("blocked_times")
+            .select("*")
+            .in_("staff_id", missing_ids)
+            .execute()
+        ).data
+
+        grouped: Dict[int, List[BlockedTimeResponse]] = {
+            staff_id: [] for staff_id in missing_ids
+        }
+        for blocked_time in all_blocked_times:
+            grouped[blocked_time["staff_id"]].append(blocked_time)
+
+        for staff_id, blocked_times in grouped.items():
+            staffs[staff_id] = _StaffOccurrences(blocked_times)
+
+            # A write landed while loading, the rows may be from before it
+            # This request still uses them, the next lookup loads again
+            if (
+                self._epoch != epoch
+                or self._generations.get(staff_id, 0) != generations[staff_id]
+            ):
+                continue
+
+            self._staffs[staff_id] = staffs[staff_id]
+
+            for blocked_time in blocked_times:
+                self._staff_by_blocked_time[blocked_time["id"]] = staff_id
+
+        return staffs
+
+    def get_time_range(self, blocked_time: BlockedTimeResponse) -> Optional[TimeRange]:
+        # Only for the indexed version of the row (not a copy, or a row loaded since)
+        occurrences = self._staffs.get(blocked_time["staff_id"])
+
+        if (
+            occurrences is None
+            or occurrences.blocked_times.get(blocked_time["id"]) is not blocked_time
+        ):
+            return None
+
+        return occurrences.ranges[blocked_time["id"]]
+
+    def _bump(self, staff_id: int) -> None:
+        self._generations[staff_id] = self._generations.get(staff_id, 0) + 1
+
+    def put(self, blocked_time: BlockedTimeResponse) -> None:
+        # The staff may have changed on update
+        self.remove(blocked_time["id"])
+
+        staff_id = blocked_time["staff_id"]
+        self._bump(staff_id)
+        self._staff_by_blocked_time[blocked_time["id"]] = staff_id
+
+        # Staffs that are not indexed yet will load it on their first lookup
+        if staff_id in self._staffs:
+            self._staffs[staff_id].put(blocked_time)
+
+    def remove(self, blocked_time_id: int) -> None:
+        staff_id = self._staff_by_blocked_time.pop(blocked_time_id, None)
+
+        if staff_id is None:
+            # Its staff is not indexed (or it is new), a load in flight may still hold it
+            self._epoch += 1
+            return
+
+        self._bump(staff_id)
+        if staff_id in self._staffs:
+            self._staffs[staff_id].remove(blocked_time_id)
+
+    def drop_staff(self, staff_id: int) -> None:
+        self._bump(staff_id)
+        self._staffs.pop(staff_id, None)
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._staffs.clear()
+        self._staff_by_blocked_time.clear()
+
+
+blocked_time_index = BlockedTimeOccurrenceIndex()
+
+
+def _get_blocked_time_range(blocked_time: BlockedTimeResponse) -> TimeRange:
+    # Rows served by the index were converted when loaded, others are converted here
+    time_range = blocked_time_index.get_time_range(blocked_time)
+
+    return time_range if time_range is not None else _to_time_range(blocked_time)
 
 
 CalendarForms = Literal["Appointment", "Blocked time", "Time off", "Shift"]
@@ -180,13 +550,10 @@ async def _has_overlapping_blocked_times(
     ]
 
     # Check for overlaps
+    target_range = TimeRange.from_times(args.target_start_time, args.target_end_time)
+
     has_overlapping = any(
-        has_overlap(
-            blocked_time["from_time"][:5],  # Cut away the seconds
-            blocked_time["to_time"][:5],  # Cut away the seconds
-            args.target_start_time,
-            args.target_end_time,
-        )
+        has_overlap(_get_blocked_time_range(blocked_time), target_range)
         for blocked_time in staff_blocked_times
     )
 
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+"""
+    [In-process cache]
+    1) For data that is read on every page but rarely written (eg: outlets, services)
+    2) Entries expire after a TTL, which bounds staleness across worker processes
+    3) Writes through our own routes invalidate explicitly, so they show up immediately
+
+    Keys are tuples, whose first element is the namespace (eg: ("services", 1))
+    Invalidating a namespace drops every key under it
+"""
+
+REFERENCE_CACHE_TTL_SECONDS = float(
+    os.environ.get("REFERENCE_CACHE_TTL_SECONDS", "300")
+)
+
+CacheKey = Tuple[Hashable, ...]
+
+
+class TTLCache:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[CacheKey, Tuple[float, Any]] = {}
+        self._loading: Dict[CacheKey, asyncio.Future] = {}
+
+        # Bumped on every invalidation, so loads that raced a write are not stored
+        self._generations: Dict[Hashable, int] = {}
+
+    def get(self, key: CacheKey) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return False, None
+
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            self._entries.pop(key, None)
+            return False, None
+
+        return True, value
+
+    def set(self, key: CacheKey, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    async def get_or_load(
+        self, key: CacheKey, loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        is_hit, value = self.get(key)
+        if is_hit:
+            return value
+
+        # Concurrent misses share a single load
+        if key in self._loading:
+            return await asyncio.shield(self._loading[key])
+
+        namespace = key[0]
+        generation = self._generations.get(namespace, 0)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+
+        try:
+            value = await loader()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark as retrieved, waiters (if any) re-raise it
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            self._loading.pop(key, None)
+
+        if self._generations.get(namespace, 0) == generation:
+            self.set(key, value)
+
+        future.set_result(value)
+        return value
+
+    def invalidate(self, *namespaces: Hashable) -> None:
+        for namespace in namespaces:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+        for key in [key for key in self._entries if key[0] in namespaces]:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        for namespace in {key[0] for key in self._entries}:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+        self._entries.clear()
+
+
+# Outlets, category colors, service categories, services and staffs
+reference_cache = TTLCache(REFERENCE_CACHE_TTL_SECONDS)
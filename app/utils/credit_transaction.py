@@ -0,0 +1,58 @@
+from typing import Optional
+
+from fastapi import HTTPException
+from supabase import AClient
+
+from app.models.appointment.appointment import AppointmentResponse
+
+"""
+    [Credit ledger]
+    1) Balance changes run as Postgres functions (see db/credit_ledger.sql)
+    2) The funds check, the balance change and the credit_transactions row
+       are one transaction, in one round trip
+    3) Balances are changed relative to their current value, under a row lock,
+       so concurrent bookings for the same customer cannot lose updates
+"""
+
+
+async def _upsert_appointment_with_credits(
+    payload: dict,  # The appointment row, without an id to create it
+    supabase: AClient,
+) -> AppointmentResponse:
+    # Writes the appointment and charges (or refunds) the difference with
+    # what it already paid, in one transaction: nothing is stored on error
+    is_new = not payload.get("id")
+
+    result = (
+        await supabase.rpc(
+            "upsert_appointment_with_credits", {"p_appointment": payload}
+        ).execute()
+    ).data
+
+    error = result.get("error")
+
+    if error == "insufficient_credits":
+        raise HTTPException(
+            status_code=400,
+            detail="Insufficient credits for new appointment"
+            if is_new
+            else "Insufficient credits for updated appointment",
+        )
+
+    if error == "appointment_not_found":
+        raise HTTPException(
+            status_code=404, detail="Appointment to be updated not found"
+        )
+
+    return result
+
+
+async def _delete_appointment_with_refund(
+    appointment_id: int, supabase: AClient
+) -> Optional[AppointmentResponse]:
+    # Returns the deleted appointment, None if it did not exist
+    return (
+        await supabase.rpc(
+            "delete_appointment_with_refund", {"p_appointment_id": appointment_id}
+        ).execute()
+    ).data
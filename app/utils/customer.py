@@ -0,0 +1,409 @@
+import asyncio
+import heapq
+import logging
+import os
+import re
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from supabase import AClient
+
+from app.models.customer import CustomerResponse
+from app.utils.pagination import _iter_pages
+
+logger = logging.getLogger(__name__)
+
+"""
+    [Customer search index]
+    1) Every customer's search terms (from their names, email and phone) are kept in-process
+    2) Terms are matched by prefix (sorted list + bisect), and inside words by trigrams
+       (eg: "9123" finds +65 9123 4567, "son" finds Jackson)
+    3) Every word of the query must match, results are ranked and cut to the top N
+    4) _upsert_customer and delete_customer update it in place, and it is rebuilt in the
+       background every INDEX_TTL_SECONDS (for writes made by other worker processes)
+    5) Only ids are ranked in memory, the top N rows are then fetched in one query,
+       so results are never stale (eg: credit balances changed by the credit ledger)
+"""
+
+INDEX_TTL_SECONDS = float(os.environ.get("CUSTOMER_SEARCH_INDEX_TTL_SECONDS", "600"))
+LOAD_PAGE_SIZE = 1000  # PostgREST caps rows per request
+
+# What the terms and rank keys are built from (rows themselves are fetched per search)
+INDEX_COLUMNS = "id, first_name, last_name, email, phone"
+
+DEFAULT_SEARCH_LIMIT = 20
+
+# Ranking, per query word: how it matched, then what it matched
+EXACT, PREFIX, INFIX = 30, 20, 10
+NAME, OTHER = 2, 1
+
+Term = Tuple[str, int]  # (term, weight)
+
+
+def _normalize(text: str) -> str:
+    # Lowercase, without accents (eg: "José" -> "jose")
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _normalize_phone(phone: str) -> str:
+    return re.sub(r"\D", "", phone)
+
+
+def _trigrams(term: str) -> Set[str]:
+    return {term[i : i + 3] for i in range(len(term) - 2)}
+
+
+def _get_terms(customer: CustomerResponse) -> List[Term]:
+    terms: List[Term] = []
+
+    for name in (customer.get("first_name"), customer.get("last_name")):
+        for word in re.split(r"[\s\-']+", _normalize(name or "")):
+            if word:
+                terms.append((word, NAME))
+
+    if customer.get("email"):
+        terms.append((_normalize(customer["email"]), OTHER))
+
+    phone = _normalize_phone(customer.get("phone") or "")
+    if phone:
+        terms.append((phone, OTHER))
+
+        # Without the country code (last 8 digits in SG), so local numbers match by prefix
+        if len(phone) > 8:
+            terms.append((phone[-8:], OTHER))
+
+    return terms
+
+
+def _is_infix_indexed(term: str, weight: int) -> bool:
+    # Names and phone numbers, emails only match by prefix
+    return weight == NAME or term.isdigit()
+
+
+def _get_haystacks(terms: List[Term]) -> Tuple[str, str, str]:
+    # " a b " finds exact terms as " a ", and prefixes as " a..."
+    names = [term for term, weight in terms if weight == NAME]
+    others = [term for term, weight in terms if weight == OTHER]
+    phones = [term for term in others if term.isdigit()]
+
+    return tuple(f" {' '.join(group)} " for group in (names, others, phones))
+
+
+def _parse_query(query: str) -> List[str]:
+    words = []
+    is_previous_phone = False
+
+    for word in query.split():
+        # Phone numbers are typed with +, -, () and spaces (eg: +65 9123 4567)
+        # so consecutive phone parts are joined back into one number
+        if re.fullmatch(r"[\d+\-()]+", word):
+            word = _normalize_phone(word)
+
+            if word and is_previous_phone:
+                words[-1] += word
+                continue
+
+            is_previous_phone = bool(word)
+        else:
+            word = _normalize(word)
+            is_previous_phone = False
+
+        if word:
+            words.append(word)
+
+    return words
+
+
+class CustomerSearchIndex:
+    def __init__(self):
+        self._terms: Dict[int, List[Term]] = {}
+        self._rank_keys: Dict[int, Tuple[int, int]] = {}  # (name length, id)
+
+        # Per customer, " "-joined name, email + phone, and phone terms (see _get_haystacks)
+        self._haystacks: Dict[int, Tuple[str, str, str]] = {}
+
+        # (term, customer id, weight), sorted for prefix lookups
+        self._sorted_terms: List[Tuple[str, int, int]] = []
+
+        # Trigram -> customer ids (name and phone terms, emails only match by prefix)
+        self._trigrams: Dict[str, Set[int]] = defaultdict(set)
+
+        self._loaded_at: Optional[float] = None
+        self._load_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        # Writes made while a rebuild is loading, replayed onto the rebuilt index
+        self._pending: Optional[List[Tuple[str, object]]] = None
+
+    async def search(
+        self,
+        query: str,
+        supabase: AClient,
+        limit: int = DEFAULT_SEARCH_LIMIT,
+        columns: str = "*",  # Must include id
+    ) -> List[CustomerResponse]:
+        await self._ensure_loaded(supabase)
+
+        words = _parse_query(query)
+        if not words:
+            return []
+
+        # Customers must match every word, scores add up
+        # The most selective word scans the index, the others only check its matches
+        words.sort(key=self._estimate_matches)
+
+        scores = self._match(words[0])
+        for word in words[1:]:
+            if not scores:
+                break
+
+            scores = self._match_candidates(word, scores)
+
+        top_ids = self._top(scores, limit)
+        if not top_ids:
+            return []
+
+        response = (
+            await supabase.from_("customers")
+            .select(columns)
+            .in_("id", top_ids)
+            .execute()
+        )
+
+        # Back in ranked order, without customers deleted by another worker process
+        by_id = {customer["id"]: customer for customer in response.data}
+        return [by_id[customer_id] for customer_id in top_ids if customer_id in by_id]
+
+    def _prefix_range(self, word: str) -> Tuple[int, int]:
+        # Slice of _sorted_terms starting with word
+        low = bisect_left(self._sorted_terms, (word,))
+        high = bisect_left(self._sorted_terms, (word + "\uffff",), low)
+        return low, high
+
+    def _estimate_matches(self, word: str) -> int:
+        low, high = self._prefix_range(word)
+        estimate = high - low
+
+        if len(word) >= 3:
+            estimate += min(
+                len(self._trigrams.get(gram, ())) for gram in _trigrams(word)
+            )
+
+        return estimate
+
+    def _match(self, word: str) -> Dict[int, int]:
+        scores: Dict[int, int] = {}
+
+        # Prefix (and exact) matches
+        low, high = self._prefix_range(word)
+        for term, customer_id, weight in self._sorted_terms[low:high]:
+            score = (EXACT if term == word else PREFIX) + weight
+            if score > scores.get(customer_id, 0):
+                scores[customer_id] = score
+
+        # Matches inside a term, by trigrams (then checked against the terms themselves)
+        if len(word) >= 3:
+            gram_sets = sorted(
+                (self._trigrams.get(gram, set()) for gram in _trigrams(word)), key=len
+            )
+            candidates = set.intersection(*gram_sets)
+
+            # A 3 letter word is its own trigram, which only name terms have
+            if len(word) == 3 and not word.isdigit():
+                for customer_id in candidates:
+                    scores.setdefault(customer_id, INFIX + NAME)
+
+                return scores
+
+            for customer_id in candidates:
+                if customer_id in scores:
+                    continue
+
+                score = self._score_terms(word, customer_id)
+                if score:
+                    scores[customer_id] = score
+
+        return scores
+
+    def _match_candidates(self, word: str, scores: Dict[int, int]) -> Dict[int, int]:
+        matched = {}
+
+        for customer_id, score in scores.items():
+            word_score = self._score_terms(word, customer_id)
+            if word_score:
+                matched[customer_id] = score + word_score
+
+        return matched
+
+    def _score_terms(self, word: str, customer_id: int) -> int:
+        # Substring checks over the joined terms, from the best possible score down
+        names, others, phones = self._haystacks[customer_id]
+        exact, prefix = f" {word} ", f" {word}"
+
+        if exact in names:
+            return EXACT + NAME
+        if exact in others:
+            return EXACT + OTHER
+        if prefix in names:
+            return PREFIX + NAME
+        if prefix in others:
+            return PREFIX + OTHER
+
+        # Emails only match by prefix
+        if len(word) >= 3:
+            if word in names:
+                return INFIX + NAME
+            if word in phones:
+                return INFIX + OTHER
+
+        return 0
+
+    def _top(self, scores: Dict[int, int], limit: int) -> List[int]:
+        # Best score first, then shortest name (closest match), then oldest customer
+        # Only the lowest score bucket that makes the cut needs a partial sort
+        by_score: Dict[int, List[int]] = defaultdict(list)
+        for customer_id, score in scores.items():
+            by_score[score].append(customer_id)
+
+        tiebreak = self._rank_keys.__getitem__
+
+        top: List[int] = []
+        for score in sorted(by_score, reverse=True):
+            bucket = heapq.nsmallest(limit - len(top), by_score[score], key=tiebreak)
+            top.extend(bucket)
+
+            if len(top) >= limit:
+                break
+
+        return top
+
+    async def _ensure_loaded(self, supabase: AClient) -> None:
+        if self._loaded_at is None:
+            # First search waits for the index
+            async with self._load_lock:
+                if self._loaded_at is None:
+                    await self._rebuild(supabase)
+            return
+
+        # Afterwards, stale indexes keep serving while they rebuild in the background
+        is_stale = time.monotonic() - self._loaded_at > INDEX_TTL_SECONDS
+        if is_stale and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._refresh(supabase))
+
+    async def _refresh(self, supabase: AClient) -> None:
+        try:
+            async with self._load_lock:
+                await self._rebuild(supabase)
+        except Exception as e:
+            # Keep serving the stale index, the next search retries
+            logger.error(
+                f"Error rebuilding customer search index: {str(e)}", exc_info=True
+            )
+
+    async def _rebuild(self, supabase: AClient) -> None:
+        self._pending = []
+
+        try:
+            rebuilt = CustomerSearchIndex()
+
+            async for customers in _iter_pages(
+                lambda: supabase.from_("customers").select(INDEX_COLUMNS),
+                ("id",),
+                LOAD_PAGE_SIZE,
+            ):
+                for customer in customers:
+                    rebuilt._add(customer, sort=False)
+
+            rebuilt._sorted_terms.sort()
+
+            for action, value in self._pending:
+                rebuilt._remove(value["id"] if action == "put" else value)
+                if action == "put":
+                    rebuilt._add(value)
+        finally:
+            self._pending = None
+
+        self._terms = rebuilt._terms
+        self._rank_keys = rebuilt._rank_keys
+        self._haystacks = rebuilt._haystacks
+        self._sorted_terms = rebuilt._sorted_terms
+        self._trigrams = rebuilt._trigrams
+        self._loaded_at = time.monotonic()
+
+    def _add(self, customer: CustomerResponse, sort: bool = True) -> None:
+        customer_id = customer["id"]
+        terms = _get_terms(customer)
+
+        self._terms[customer_id] = terms
+        self._haystacks[customer_id] = _get_haystacks(terms)
+        self._rank_keys[customer_id] = (
+            len(customer.get("first_name") or "")
+            + len(customer.get("last_name") or ""),
+            customer_id,
+        )
+
+        for term, weight in terms:
+            if sort:
+                insort(self._sorted_terms, (term, customer_id, weight))
+            else:
+                self._sorted_terms.append((term, customer_id, weight))
+
+            if _is_infix_indexed(term, weight):
+                for gram in _trigrams(term):
+                    self._trigrams[gram].add(customer_id)
+
+    def put(self, customer: CustomerResponse) -> None:
+        if self._pending is not None:
+            self._pending.append(("put", customer))
+
+        # Nothing to update until the first search loads the index
+        if self._loaded_at is None:
+            return
+
+        # Logged as one "put" above, so a rebuild does not replay a remove after it
+        self._remove(customer["id"])
+        self._add(customer)
+
+    def remove(self, customer_id: int) -> None:
+        if self._pending is not None:
+            self._pending.append(("remove", customer_id))
+
+        self._remove(customer_id)
+
+    def _remove(self, customer_id: int) -> None:
+        terms = self._terms.pop(customer_id, None)
+        if terms is None:
+            return
+
+        self._rank_keys.pop(customer_id, None)
+        self._haystacks.pop(customer_id, None)
+
+        for term, weight in terms:
+            index = bisect_left(self._sorted_terms, (term, customer_id, weight))
+            if index < len(self._sorted_terms) and self._sorted_terms[index][:2] == (
+                term,
+                customer_id,
+            ):
+                del self._sorted_terms[index]
+
+            for gram in _trigrams(term):
+                ids = self._trigrams.get(gram)
+                if ids is not None:
+                    ids.discard(customer_id)
+                    if not ids:
+                        del self._trigrams[gram]
+
+    def clear(self) -> None:
+        self._rank_keys.clear()
+        self._haystacks.clear()
+        self._terms.clear()
+        self._sorted_terms.clear()
+        self._trigrams.clear()
+        self._loaded_at = None
+
+
+customer_search_index = CustomerSearchIndex()
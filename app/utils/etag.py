@@ -0,0 +1,85 @@
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+"""
+    [Conditional GET]
+    1) List responses carry an ETag, the hash of the exact JSON body
+       (weak, since the same body may go out gzipped or not, see app/middleware.py)
+    2) If the client already has that body (If-None-Match), we answer 304 with no body
+    3) Content hashes (not per-process version counters) stay correct across worker processes
+
+    For data served from the in-process cache, the rendered body and its ETag are
+    memoized until the cache reloads (ie: until a write invalidates it).
+    Memo keys include request values (eg: outlet, fields), so the memo is a bounded LRU
+
+    Everything else (eg: customers) is still queried and rendered on every request,
+    to hash it: a 304 only saves sending the body, not the DB round trip
+"""
+
+ETAG_MAX_MEMOIZED_BODIES = int(os.environ.get("ETAG_MAX_MEMOIZED_BODIES", "256"))
+
+# memo_key -> (source object, body, etag), least recently used first
+_rendered: OrderedDict[Hashable, Tuple[Any, bytes, str]] = OrderedDict()
+
+
+def _render(adapter: TypeAdapter, data: Any) -> Tuple[bytes, str]:
+    # Same validation and camelCase output as the route's response_model
+    body = adapter.dump_json(adapter.validate_python(data), by_alias=True)
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    return body, etag
+
+
+def _is_not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    # If-None-Match uses the weak comparison
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    opaque_tag = etag.removeprefix("W/")
+    return any(candidate.removeprefix("W/") == opaque_tag for candidate in candidates)
+
+
+def etag_response(
+    request: Request,
+    adapter: TypeAdapter,
+    data: Any,
+    memo_key: Optional[Hashable] = None,
+    source: Any = None,
+) -> Response:
+    """
+    Serialize data (validated by adapter) with an ETag, or answer 304 Not Modified.
+
+    Pass memo_key (and source, the cached object the data came from, if not data itself)
+    to reuse the rendered body for as long as that cached object is unchanged.
+    """
+
+    source = data if source is None else source
+
+    memo = _rendered.get(memo_key) if memo_key is not None else None
+    if memo is not None and memo[0] is source:
+        _, body, etag = memo
+        _rendered.move_to_end(memo_key)
+    else:
+        body, etag = _render(adapter, data)
+        if memo_key is not None:
+            _rendered[memo_key] = (source, body, etag)
+            _rendered.move_to_end(memo_key)
+
+            while len(_rendered) > ETAG_MAX_MEMOIZED_BODIES:
+                _rendered.popitem(last=False)
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if _is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
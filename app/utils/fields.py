@@ -0,0 +1,62 @@
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple, Type
+
+from fastapi import HTTPException
+
+from app.models._admin import BaseSchema
+from app.utils.fast_json import TrustedAdapter
+
+"""
+    [Sparse fieldsets]
+    1) Read routes take an optional ?fields=id,firstName,lastName (camelCase or snake_case)
+    2) Only those columns are selected from PostgREST (id is always included)
+    3) Those rows go out through the fast JSON path (see app/utils/fast_json.py),
+       trimmed to just those fields (adapters are built once per distinct fieldset)
+"""
+
+
+class Fieldset(NamedTuple):
+    columns: Tuple[str, ...]
+    adapter: TrustedAdapter  # List of trimmed rows
+    page_adapter: TrustedAdapter  # Page of trimmed rows
+
+    def select(self, *required: str) -> str:
+        # Extra columns a route needs internally (eg: pagination keys)
+        # are fetched, but dropped from the response by the adapters
+        return ",".join(dict.fromkeys((*self.columns, *required)))
+
+
+@lru_cache(maxsize=128)
+def _build_fieldset(model: Type[BaseSchema], columns: Tuple[str, ...]) -> Fieldset:
+    return Fieldset(
+        columns,
+        TrustedAdapter(model, columns=columns),
+        TrustedAdapter(model, page=True, columns=columns),
+    )
+
+
+def _parse_fields(model: Type[BaseSchema], fields: Optional[str]) -> Optional[Fieldset]:
+    if fields is None:
+        return None
+
+    # Accept either the response (camelCase) or the column (snake_case) name
+    names = {}
+    for name, field in model.model_fields.items():
+        names[name] = name
+        if field.alias:
+            names[field.alias] = name
+
+    columns = {"id"}
+    for requested in fields.split(","):
+        requested = requested.strip()
+        if not requested:
+            continue
+
+        if requested not in names:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {requested}")
+
+        columns.add(names[requested])
+
+    # Keep the model's field order, so equal fieldsets share their adapters
+    ordered = tuple(name for name in model.model_fields if name in columns)
+    return _build_fieldset(model, ordered)
@@ -1,8 +1,79 @@
-def has_overlap(start1: str, end1: str, start2: str, end2: str) -> bool:
+import asyncio
+from datetime import datetime, time
+from typing import Any, Awaitable, List, NamedTuple
+
+"""
+    [Time format]
+    1) Internally, times of day are minutes since midnight (ints)
+    2) Rows are converted ONCE, then compared as ints (no string slicing/comparing)
+"""
+
+
+def to_minutes(value: str | time | datetime) -> int:
+    # HH:mm, HH:mm:ss, time or datetime
+    if isinstance(value, (time, datetime)):
+        return value.hour * 60 + value.minute
+
+    return int(value[:2]) * 60 + int(value[3:5])
+
+
+def datetime_string_to_minutes(datetime_string: str) -> int:
+    return to_minutes(datetime.fromisoformat(datetime_string))
+
+
+def to_time_string(minutes: int) -> str:
+    # HH:mm
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class TimeRange(NamedTuple):
+    """
+    Half-open [start, end) range within a day, in minutes since midnight.
+    Immutable, and slotted (no per-instance __dict__).
+    """
+
+    start: int
+    end: int
+
+    @classmethod
+    def from_times(cls, start: str | time, end: str | time) -> "TimeRange":
+        return cls(to_minutes(start), to_minutes(end))
+
+    @classmethod
+    def from_datetime_strings(cls, start: str, end: str) -> "TimeRange":
+        return cls(datetime_string_to_minutes(start), datetime_string_to_minutes(end))
+
+    def overlaps(self, other: "TimeRange") -> bool:
+        return self.start < other.end and self.end > other.start
+
+    def contains(self, other: "TimeRange") -> bool:
+        return self.start <= other.start and other.end <= self.end
+
+    def __str__(self) -> str:
+        return f"{to_time_string(self.start)}-{to_time_string(self.end)}"
+
+
+def has_overlap(first: TimeRange, second: TimeRange) -> bool:
     """
     Check if two time ranges overlap.
-    Args are all in HH:mm format (24 hour).
     """
 
-    print("here", start1, end1, start2, end2)
-    return start1 < end2 and end1 > start2
+    return first.overlaps(second)
+
+
+async def run_concurrently(*awaitables: Awaitable[Any]) -> List[Any]:
+    """
+    Run independent awaitables (eg: cross checks, reads) at the same time.
+    Results are returned in argument order.
+
+    If any of them fail, the exception of the EARLIEST failing argument is raised.
+    This keeps the same error precedence as awaiting them one after another.
+    """
+
+    results = await asyncio.gather(*awaitables, return_exceptions=True)
+
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+    return results
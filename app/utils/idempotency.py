@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Protocol, Tuple
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+
+"""
+    [Idempotency keys]
+    1) Create routes accept an Idempotency-Key header (eg: a UUID the tablet makes per submit)
+    2) The first request with a key runs, and its result is stored (for a TTL)
+    3) Retries with the same key get the stored result back, with Idempotent-Replayed: true,
+       without running the validation or touching the DB again
+    4) Retries that arrive while the first request is still running wait for its result
+    5) Errors are not stored, so a failed request can be retried with the same key
+    6) Reusing a key for a different request body is rejected
+"""
+
+IDEMPOTENCY_KEY_TTL_SECONDS = float(
+    os.environ.get("IDEMPOTENCY_KEY_TTL_SECONDS", "86400")  # 24 hours
+)
+IDEMPOTENCY_MAX_KEYS = int(os.environ.get("IDEMPOTENCY_MAX_KEYS", "10000"))
+
+MAX_KEY_LENGTH = 255
+
+
+class StoredResult(NamedTuple):
+    fingerprint: str  # Of the request body
+    result: Any  # What the route returned, JSON-serializable
+
+
+class IdempotencyStore(Protocol):
+    """
+    Where results are kept, in-memory (per worker process) by default.
+    A shared store (eg: Redis) can be plugged in with set_idempotency_store().
+    """
+
+    async def get(self, key: str) -> Optional[StoredResult]: ...
+
+    async def set(self, key: str, stored: StoredResult) -> None: ...
+
+
+class InMemoryIdempotencyStore:
+    """Bounded, least recently used keys are evicted first"""
+
+    def __init__(self, max_keys: int, ttl_seconds: float):
+        self.max_keys = max_keys
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, Tuple[float, StoredResult]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[StoredResult]:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        expires_at, stored = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return stored
+
+    async def set(self, key: str, stored: StoredResult) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, stored)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+idempotency_store: IdempotencyStore = InMemoryIdempotencyStore(
+    IDEMPOTENCY_MAX_KEYS, IDEMPOTENCY_KEY_TTL_SECONDS
+)
+
+
+def set_idempotency_store(store: IdempotencyStore) -> None:
+    global idempotency_store
+    idempotency_store = store
+
+
+# Keys whose first request is still running (in this worker process)
+_in_flight: Dict[str, asyncio.Future] = {}
+
+
+async def _run_idempotently(
+    idempotency_key: Optional[str],
+    scope: str,  # Keys are per route (eg: "appointments")
+    request_body: BaseModel,
+    response: Response,
+    handler: Callable[[], Awaitable[Any]],
+) -> Any:
+    if idempotency_key is None:
+        return await handler()
+
+    if not idempotency_key.strip() or len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Invalid Idempotency-Key header")
+
+    key = f"{scope}:{idempotency_key}"
+    fingerprint = hashlib.sha256(request_body.model_dump_json().encode()).hexdigest()
+
+    while key in _in_flight:
+        await asyncio.wait([_in_flight[key]])
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+
+    try:
+        stored = await idempotency_store.get(key)
+
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key was already used for a different request",
+                )
+
+            response.headers["Idempotent-Replayed"] = "true"
+            return stored.result
+
+        result = await handler()
+        await idempotency_store.set(key, StoredResult(fingerprint, result))
+
+        return result
+
+    finally:
+        _in_flight.pop(key, None)
+        future.set_result(None)
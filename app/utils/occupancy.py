@@ -0,0 +1,125 @@
+from typing import Dict, List
+
+from app.models.appointment.appointment import AppointmentResponse
+from app.models.staff.blocked_time import BlockedTimeResponse
+from app.models.staff.shift import ShiftResponse
+from app.models.staff.time_off import TimeOffResponse
+from app.utils.blocked_time import _get_blocked_time_range
+from app.utils.general import TimeRange
+from app.utils.shift import _get_working_hours
+from app.utils.time_off import _get_time_off_range
+
+"""
+    [Occupancy bitmaps]
+    1) A staff's day is a 1440 bit integer, bit i <=> minute i after midnight
+    2) Ranges are half-open, [start, end), same as TimeRange
+    3) Overlap, containment and free gap queries are then single bitwise operations
+    4) Python ints are arbitrary precision, so this needs no extra dependency
+"""
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def _interval_mask(time_range: TimeRange) -> int:
+    start, end = time_range
+    if end <= start:
+        return 0
+
+    return ((1 << (end - start)) - 1) << start
+
+
+class StaffOccupancy:
+    __slots__ = ("busy", "working")
+
+    def __init__(self, working_hours: TimeRange):
+        self.working = _interval_mask(working_hours)
+        self.busy = 0
+
+    def add_busy(self, time_range: TimeRange) -> None:
+        self.busy |= _interval_mask(time_range)
+
+    def is_within_working_hours(self, time_range: TimeRange) -> bool:
+        target = _interval_mask(time_range)
+        return self.working & target == target
+
+    def is_free(self, time_range: TimeRange) -> bool:
+        return self.busy & _interval_mask(time_range) == 0
+
+    def is_bookable(self, time_range: TimeRange) -> bool:
+        return self.is_within_working_hours(time_range) and self.is_free(time_range)
+
+    @property
+    def available(self) -> int:
+        return self.working & ~self.busy
+
+    def get_free_start_times(self, duration: int, slot_minutes: int) -> List[int]:
+        """
+        Every start time (on the slot_minutes grid) where [start, start + duration)
+        is entirely available.
+        """
+
+        # Bit i survives iff bits i .. i + duration - 1 are all available
+        # Built with O(log duration) shift-and-AND steps
+        runs = self.available
+        covered = 1
+        while covered < duration:
+            step = min(covered, duration - covered)
+            runs &= runs >> step
+            covered += step
+
+        return [
+            start
+            for start in range(0, MINUTES_PER_DAY - duration + 1, slot_minutes)
+            if runs >> start & 1
+        ]
+
+    def get_utilization(self) -> float:
+        # Fraction of working minutes that are busy
+        working_minutes = self.working.bit_count()
+        if working_minutes == 0:
+            return 0.0
+
+        return (self.working & self.busy).bit_count() / working_minutes
+
+
+def _build_staff_occupancies(
+    staff_ids: List[int],
+    is_weekday: bool,
+    shifts: List[ShiftResponse],
+    appointments: List[AppointmentResponse],
+    time_offs: List[TimeOffResponse],
+    blocked_times: List[BlockedTimeResponse],
+) -> Dict[int, StaffOccupancy]:
+    # Rows of staffs outside staff_ids are ignored
+    shift_by_staff = {shift["staff_id"]: shift for shift in shifts}
+
+    occupancies = {
+        staff_id: StaffOccupancy(
+            _get_working_hours(shift_by_staff.get(staff_id), is_weekday)
+        )
+        for staff_id in staff_ids
+    }
+
+    for appointment in appointments:
+        # Cancelled appointments free up their slot
+        if appointment["status"] == "Cancelled":
+            continue
+
+        if appointment["staff_id"] in occupancies:
+            occupancies[appointment["staff_id"]].add_busy(
+                TimeRange.from_datetime_strings(
+                    appointment["start_time"], appointment["end_time"]
+                )
+            )
+
+    for time_off in time_offs:
+        if time_off["staff_id"] in occupancies:
+            occupancies[time_off["staff_id"]].add_busy(_get_time_off_range(time_off))
+
+    for blocked_time in blocked_times:
+        if blocked_time["staff_id"] in occupancies:
+            occupancies[blocked_time["staff_id"]].add_busy(
+                _get_blocked_time_range(blocked_time)
+            )
+
+    return occupancies
@@ -0,0 +1,69 @@
+from typing import Dict, List, Literal
+
+from supabase import AClient
+
+"""
+    [Outlet links]
+    1) staff_outlet and service_outlet link a staff / service to the outlets it is at
+    2) Edits only apply the difference with the current links,
+       as one bulk insert and one filtered delete (each skipped if there is nothing to do)
+    3) New links are inserted before old ones are deleted,
+       so a staff / service never briefly belongs to no outlet
+"""
+
+OutletLinkTable = Literal["staff_outlet", "service_outlet"]
+
+LINK_COLUMNS: Dict[str, str] = {
+    "staff_outlet": "staff_id",
+    "service_outlet": "service_id",
+}
+
+
+async def _get_linked_outlet_ids(
+    table: OutletLinkTable, entity_id: int, supabase: AClient
+) -> List[int]:
+    response = (
+        await supabase.from_(table)
+        .select("outlet_id")
+        .eq(LINK_COLUMNS[table], entity_id)
+        .execute()
+    )
+
+    return [item["outlet_id"] for item in response.data]
+
+
+async def _update_outlet_links(
+    table: OutletLinkTable,
+    entity_id: int,
+    locations: List[int],  # outlet_id
+    current_locations: List[int],  # [] for a new staff / service
+    supabase: AClient,
+) -> None:
+    column = LINK_COLUMNS[table]
+
+    added = [
+        outlet_id
+        for outlet_id in dict.fromkeys(locations)  # Deduplicated, in order
+        if outlet_id not in current_locations
+    ]
+    removed = [
+        outlet_id for outlet_id in current_locations if outlet_id not in locations
+    ]
+
+    if added:
+        await (
+            supabase.from_(table)
+            .insert(
+                [{column: entity_id, "outlet_id": outlet_id} for outlet_id in added]
+            )
+            .execute()
+        )
+
+    if removed:
+        await (
+            supabase.from_(table)
+            .delete()
+            .eq(column, entity_id)
+            .in_("outlet_id", removed)
+            .execute()
+        )
@@ -0,0 +1,128 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+"""
+    [Keyset pagination]
+    1) Rows are sorted by a unique key, eg: (id) or (start_time, id)
+    2) The cursor is the (opaque) key of the last row on the page
+    3) The next page is every row strictly after it, so pages never skip or repeat rows
+       (unlike offsets, when rows are inserted in between)
+    4) Cursors come from the client, so every value is parsed back to its key's type
+       (see CURSOR_KEY_PARSERS) before it goes into a filter
+"""
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def _encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _parse_id(value: Any) -> int:
+    # bool is an int subclass, but never an id
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(f"Expected an integer id, got {value!r}")
+
+    return value
+
+
+def _parse_timestamp(value: Any) -> str:
+    if not isinstance(value, str):
+        raise TypeError(f"Expected an ISO timestamp, got {value!r}")
+
+    # Normalized, so only the parsed timestamp reaches the filter
+    return datetime.fromisoformat(value).isoformat()
+
+
+# Every key that can be paginated on, and how its cursor value is checked
+CURSOR_KEY_PARSERS: Dict[str, Callable[[Any], Any]] = {
+    "id": _parse_id,
+    "start_time": _parse_timestamp,
+}
+
+
+def _decode_cursor(cursor: str, keys: Tuple[str, ...]) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("Expected one value per key")
+
+        return [CURSOR_KEY_PARSERS[key](value) for key, value in zip(keys, values)]
+
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _apply_keyset(query, keys: Tuple[str, ...], after: Optional[List[Any]]):
+    # after: key values of the last row already seen (None for the first page)
+    for key in keys:
+        query = query.order(key)
+
+    if after is None:
+        return query
+
+    values = after
+
+    if len(keys) == 1:
+        return query.gt(keys[0], values[0])
+
+    # (first, id) > (last_first, last_id)
+    # Values are double quoted, timestamps may contain reserved characters (eg: +)
+    first_key, id_key = keys
+    first_value, id_value = values
+
+    return query.or_(
+        f'{first_key}.gt."{first_value}",'
+        f'and({first_key}.eq."{first_value}",{id_key}.gt.{id_value})'
+    )
+
+
+async def _get_page(
+    query, keys: Tuple[str, ...], limit: Optional[int], cursor: Optional[str]
+) -> dict:
+    limit = limit or DEFAULT_PAGE_SIZE
+
+    after = _decode_cursor(cursor, keys) if cursor is not None else None
+
+    # One extra row tells us if there is a next page
+    query = _apply_keyset(query, keys, after).limit(limit + 1)
+    rows = (await query.execute()).data
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor([rows[-1][key] for key in keys])
+
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+async def _iter_pages(
+    build_query: Callable[[], Any],
+    keys: Tuple[str, ...],
+    page_size: int,
+    after: Optional[List[Any]] = None,
+) -> AsyncIterator[List[dict]]:
+    """
+    Walk a whole table (or filtered query) page by page, holding one page at a time.
+    build_query returns a fresh query for every page (query builders are mutable).
+    """
+
+    while True:
+        query = _apply_keyset(build_query(), keys, after).limit(page_size)
+        rows = (await query.execute()).data
+
+        if rows:
+            yield rows
+
+        if len(rows) < page_size:
+            return
+
+        after = [rows[-1][key] for key in keys]
@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import List, Literal, Optional
 
 from fastapi import HTTPException
 from pydantic import BaseModel
@@ -10,7 +10,49 @@ from app.constants import (
     WEEKEND_CLOSING,
     WEEKEND_OPENING,
 )
+from app.models.staff.shift import ShiftResponse
 from app.models.staff.staff import StaffBase
+from app.utils.general import TimeRange
+from app.utils.staff import _get_staff_ids_by_outlet
+
+""" 
+    [Date format]
+    1) Dates are expected to be in YYYY-MM-DD format
+"""
+
+
+async def _get_shifts_by_outlet_and_date(
+    outlet_id: int,
+    date: str,
+    supabase: AClient,
+    staff_ids: Optional[List[int]] = None,  # If the caller already resolved them
+) -> List[ShiftResponse]:
+    # First get staff IDs for the outlet
+    if staff_ids is None:
+        staff_ids = await _get_staff_ids_by_outlet(outlet_id, supabase)
+
+    # Then get shifts for those staff on the date
+    shifts = (
+        await supabase.from_("shifts")
+        .select("*")
+        .in_("staff_id", staff_ids)
+        .eq("shift_date", date)
+        .execute()
+    )
+
+    return shifts.data
+
+
+def _get_working_hours(shift: Optional[ShiftResponse], is_weekday: bool) -> TimeRange:
+    # Determine shift hours (use defaults if no shift found)
+    if shift:
+        return TimeRange.from_times(shift["start_time"], shift["end_time"])
+
+    if is_weekday:
+        return TimeRange.from_times(WEEKDAY_OPENING, WEEKDAY_CLOSING)
+
+    return TimeRange.from_times(WEEKEND_OPENING, WEEKEND_CLOSING)
+
 
 CalendarFormsWithoutShift = Literal["Appointment", "Blocked time", "Time off"]
 
@@ -42,19 +84,11 @@ async def _is_within_staff_shift(
         staff_shift_response.data if staff_shift_response is not None else None
     )
 
-    # Determine shift hours (use defaults if no shift found)
-    if staff_shift:
-        shift_start_time = staff_shift["start_time"][:5]  # Cut away the seconds
-        shift_end_time = staff_shift["end_time"][:5]  # Cut away the seconds
-    else:
-        shift_start_time = WEEKDAY_OPENING if args.is_weekday else WEEKEND_OPENING
-        shift_end_time = WEEKDAY_CLOSING if args.is_weekday else WEEKEND_CLOSING
-
     # Check if target times are within shift hours
-    is_within_hours = (
-        args.target_end_time <= shift_end_time
-        and args.target_start_time >= shift_start_time
-    )
+    shift_range = _get_working_hours(staff_shift, args.is_weekday)
+    target_range = TimeRange.from_times(args.target_start_time, args.target_end_time)
+
+    is_within_hours = shift_range.contains(target_range)
 
     if not is_within_hours:
         raise HTTPException(
@@ -0,0 +1,86 @@
+from typing import Dict, List, Optional
+
+from supabase import AClient
+
+from app.models.staff.staff import (
+    StaffWithLocationsResponse,
+    StaffWithoutLocationsResponse,
+)
+from app.utils.cache import reference_cache
+
+"""
+    [Staff directory]
+    1) Every staff row, annotated with its locations, is cached in-process
+    2) It is a single query to (re)load, so _upsert_staff and delete_staff just invalidate it
+    3) Unknown staff ids are looked up on their own (one row), and only reload the directory
+       if the staff exists (eg: another worker process created it), so bogus ids stay cheap
+"""
+
+
+async def _get_staff_directory(
+    supabase: AClient,
+) -> Dict[int, StaffWithLocationsResponse]:
+    async def load_staffs():
+        # LEFT JOIN with staff_outlet FK table
+        # Each row is annotated with "staff_outlet": [{"outlet_id": x}, ...]
+        response = (
+            await supabase.from_("staffs")
+            .select("*, staff_outlet(outlet_id)")
+            .execute()
+        )
+
+        # Remove the annotation, replace with locations
+        directory = {}
+        for staff in response.data:
+            staff["locations"] = [
+                item["outlet_id"] for item in staff.pop("staff_outlet", [])
+            ]
+            directory[staff["id"]] = staff
+
+        return directory
+
+    return await reference_cache.get_or_load(("staffs",), load_staffs)
+
+
+async def _get_staff(
+    staff_id: int, supabase: AClient
+) -> Optional[StaffWithLocationsResponse]:
+    directory = await _get_staff_directory(supabase)
+
+    if staff_id in directory:
+        return directory[staff_id]
+
+    # Missing from the cache, but it may have been created since it was loaded
+    response = (
+        await supabase.from_("staffs")
+        .select("id")
+        .eq("id", staff_id)
+        .maybe_single()  # One or none
+        .execute()
+    )
+
+    if response is None or not response.data:
+        return None
+
+    reference_cache.invalidate("staffs")
+    directory = await _get_staff_directory(supabase)
+
+    return directory.get(staff_id)
+
+
+async def _get_staff_ids_by_outlet(outlet_id: int, supabase: AClient) -> List[int]:
+    directory = await _get_staff_directory(supabase)
+
+    return [
+        staff_id
+        for staff_id, staff in directory.items()
+        if outlet_id in staff["locations"]
+    ]
+
+
+async def _get_staffs_by_outlet(
+    outlet_id: int, supabase: AClient
+) -> List[StaffWithoutLocationsResponse]:
+    directory = await _get_staff_directory(supabase)
+
+    return [staff for staff in directory.values() if outlet_id in staff["locations"]]
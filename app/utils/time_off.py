@@ -1,4 +1,5 @@
-from typing import List, Literal, Optional
+from datetime import date
+from typing import Dict, List, Literal, Optional
 
 from fastapi import HTTPException
 from pydantic import BaseModel
@@ -6,7 +7,9 @@ from supabase import AClient
 
 from app.models.staff.staff import StaffBase
 from app.models.staff.time_off import TimeOffResponse
-from app.utils.general import has_overlap
+from app.utils.blocked_time import _get_date_keys
+from app.utils.general import TimeRange, has_overlap
+from app.utils.staff import _get_staff_ids_by_outlet
 
 """ 
     [Date format]
@@ -14,37 +17,83 @@ from app.utils.general import has_overlap
 """
 
 
+"""
+    [Date window in the query]
+    1) Only time offs that can fall within the dates are fetched, not a staff's whole history
+    2) PostgREST keeps rows starting on/before the window's end,
+       that start within the window, or repeat until within it
+    3) _filter_by_frequency / _expand_time_offs then apply the exact rules per date
+"""
+
+
+async def _get_time_offs_by_staffs_and_window(
+    staff_ids: List[int], from_date: str, to_date: str, supabase: AClient
+) -> List[TimeOffResponse]:
+    result = (
+        await supabase.from_("time_offs")
+        .select("*")
+        .in_("staff_id", staff_ids)
+        .lte("start_date", to_date)
+        .or_(f"start_date.gte.{from_date},ends_date.gte.{from_date}")
+        .execute()
+    )
+
+    return result.data
+
+
 async def _get_time_offs_by_staff_and_date(
     staff_id: int, date: str, supabase: AClient
 ) -> List[TimeOffResponse]:
-    all_time_offs = (
-        await supabase.from_("time_offs").select("*").eq("staff_id", staff_id).execute()
-    ).data
+    time_offs = await _get_time_offs_by_staffs_and_window(
+        [staff_id], date, date, supabase
+    )
 
-    return _filter_by_frequency(all_time_offs, date)
+    return _filter_by_frequency(time_offs, date)
 
 
 async def _get_time_offs_by_outlet_and_date(
-    outlet_id: int, date: str, supabase: AClient
+    outlet_id: int,
+    date: str,
+    supabase: AClient,
+    staff_ids: Optional[List[int]] = None,  # If the caller already resolved them
 ) -> List[TimeOffResponse]:
     # First, get staff IDs for the outlet
-    staff_response = (
-        await supabase.from_("staff_outlet")
-        .select("staff_id")
-        .eq("outlet_id", outlet_id)
-        .execute()
-    )
-    staff_ids = [s["staff_id"] for s in staff_response.data]
+    if staff_ids is None:
+        staff_ids = await _get_staff_ids_by_outlet(outlet_id, supabase)
 
     # Then, get time offs for those staff
-    all_time_offs = (
-        await supabase.from_("time_offs")
-        .select("*")
-        .in_("staff_id", staff_ids)
-        .execute()
-    ).data
+    time_offs = await _get_time_offs_by_staffs_and_window(
+        staff_ids, date, date, supabase
+    )
 
-    return _filter_by_frequency(all_time_offs, date)
+    return _filter_by_frequency(time_offs, date)
+
+
+async def _get_time_offs_by_staffs_and_range(
+    staff_ids: List[int], from_date: date, to_date: date, supabase: AClient
+) -> Dict[str, List[TimeOffResponse]]:
+    time_offs = await _get_time_offs_by_staffs_and_window(
+        staff_ids, from_date.isoformat(), to_date.isoformat(), supabase
+    )
+
+    return _expand_time_offs(time_offs, from_date, to_date)
+
+
+async def _get_time_offs_by_outlet_and_range(
+    outlet_id: int,
+    from_date: date,
+    to_date: date,
+    supabase: AClient,
+    staff_ids: Optional[List[int]] = None,  # If the caller already resolved them
+) -> Dict[str, List[TimeOffResponse]]:
+    # First, get staff IDs for the outlet
+    if staff_ids is None:
+        staff_ids = await _get_staff_ids_by_outlet(outlet_id, supabase)
+
+    # Then, get time offs for those staff, keyed by date
+    return await _get_time_offs_by_staffs_and_range(
+        staff_ids, from_date, to_date, supabase
+    )
 
 
 def _filter_by_frequency(
@@ -64,6 +113,40 @@ def _filter_by_frequency(
     return valid_time_offs
 
 
+def _expand_time_offs(
+    time_offs: List[TimeOffResponse], from_date: date, to_date: date
+) -> Dict[str, List[TimeOffResponse]]:
+    """
+    Range version of _filter_by_frequency.
+    Every date in [from_date, to_date] (inclusive) is keyed, even if it has no time offs.
+    """
+
+    by_date: Dict[str, List[TimeOffResponse]] = {
+        key: [] for key in _get_date_keys(from_date, to_date)
+    }
+
+    for time_off in time_offs:
+        start_date = time_off["start_date"]
+
+        # Repeats daily until ends_date
+        if time_off["frequency"] == "None":
+            end_date = start_date
+        else:
+            end_date = time_off["ends_date"]
+
+        for key in _get_date_keys(
+            max(date.fromisoformat(start_date), from_date),
+            min(date.fromisoformat(end_date), to_date),
+        ):
+            by_date[key].append(time_off)
+
+    return by_date
+
+
+def _get_time_off_range(time_off: TimeOffResponse) -> TimeRange:
+    return TimeRange.from_times(time_off["start_time"], time_off["end_time"])
+
+
 CalendarForms = Literal["Appointment", "Blocked time", "Time off", "Shift"]
 
 
@@ -94,13 +177,10 @@ async def _has_overlapping_time_offs(
     ]
 
     # Check for overlaps
+    target_range = TimeRange.from_times(args.target_start_time, args.target_end_time)
+
     has_overlapping = any(
-        has_overlap(
-            time_off["start_time"][:5],  # Cut away the seconds
-            time_off["end_time"][:5],  # Cut away the seconds
-            args.target_start_time,
-            args.target_end_time,
-        )
+        has_overlap(_get_time_off_range(time_off), target_range)
         for time_off in staff_time_offs
     )
 
@@ -0,0 +1,135 @@
+/*
+  [Appointment batch function]
+  1) Called by the server through supabase.rpc (see app/utils/appointment_batch.py)
+  2) The batch is checked by the server first, this only writes it
+  3) It is ONE transaction: every upsert, status change and credit charge is saved,
+     or (on any error) none of them are
+  4) Depends on set_appointment_credits (see db/credit_ledger.sql), paste that file first
+
+  5) Paste this file into Supabase's SQL editor (safe to re-run)
+*/
+
+
+/*
+  [apply_appointment_batch]
+  1) p_upserts: appointment rows (snake_case), without an id to create them
+     credits_paid / payment_status are what the appointment should end up with
+  2) p_status_changes: [{ "id", "status" }]
+  3) Returns { "appointments" } (the stored rows of the upserts, then of the status changes),
+     { "error": "insufficient_credits", "index" }
+     or { "error": "appointment_not_found" } (nothing is changed in both cases)
+*/
+
+CREATE OR REPLACE FUNCTION apply_appointment_batch(
+  p_upserts JSONB,
+  p_status_changes JSONB
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_upsert RECORD;
+  v_id BIGINT;
+  v_ids BIGINT[] := '{}';
+  v_appointments JSONB;
+  v_count INTEGER;
+  v_credits JSONB;
+  v_error JSONB;
+BEGIN
+  -- Changes made in this block are rolled back if it raises
+  BEGIN
+    -- Updates, as one statement (fields missing from the row are left as they are)
+    UPDATE appointments AS a
+    SET
+      customer_id = x.customer_id,
+      staff_id = x.staff_id,
+      service_id = x.service_id,
+      outlet_id = x.outlet_id,
+      start_time = x.start_time,
+      end_time = x.end_time,
+      payment_method = x.payment_method,
+      cash_paid = x.cash_paid,
+      notes = CASE WHEN e.value ? 'notes' THEN x.notes ELSE a.notes END,
+      status = x.status
+    FROM jsonb_array_elements(p_upserts) AS e(value),
+      jsonb_populate_record(NULL::appointments, e.value) AS x
+    WHERE x.id IS NOT NULL AND a.id = x.id;
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+
+    IF v_count < (SELECT count(*) FROM jsonb_array_elements(p_upserts) AS e(value) WHERE e.value ->> 'id' IS NOT NULL) THEN
+      v_error := jsonb_build_object('error', 'appointment_not_found');
+      RAISE EXCEPTION 'appointment_not_found';
+    END IF;
+
+    -- Status changes, as one statement
+    UPDATE appointments AS a
+    SET status = x.status
+    FROM jsonb_populate_recordset(NULL::appointments, p_status_changes) AS x
+    WHERE a.id = x.id;
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+
+    IF v_count < jsonb_array_length(p_status_changes) THEN
+      v_error := jsonb_build_object('error', 'appointment_not_found');
+      RAISE EXCEPTION 'appointment_not_found';
+    END IF;
+
+    -- Creates (in order, for their ids), then credits for every upsert
+    FOR v_upsert IN
+      SELECT e.index - 1 AS index, x.*
+      FROM jsonb_array_elements(p_upserts) WITH ORDINALITY AS e(value, index),
+        jsonb_populate_record(NULL::appointments, e.value) AS x
+      ORDER BY e.index
+    LOOP
+      v_id := v_upsert.id;
+
+      IF v_id IS NULL THEN
+        INSERT INTO appointments (
+          customer_id, staff_id, service_id, outlet_id, start_time, end_time,
+          payment_method, payment_status, credits_paid, cash_paid, notes, status
+        )
+        VALUES (
+          v_upsert.customer_id, v_upsert.staff_id, v_upsert.service_id, v_upsert.outlet_id,
+          v_upsert.start_time, v_upsert.end_time, v_upsert.payment_method,
+          v_upsert.payment_status, 0, v_upsert.cash_paid, v_upsert.notes, v_upsert.status
+        )
+        RETURNING id INTO v_id;
+      END IF;
+
+      v_credits := set_appointment_credits(
+        v_id,
+        v_upsert.credits_paid,
+        v_upsert.payment_status::TEXT,
+        v_upsert.id IS NULL
+      );
+
+      IF v_credits ? 'error' THEN
+        v_error := v_credits || jsonb_build_object('index', v_upsert.index);
+        RAISE EXCEPTION '%', v_credits ->> 'error';
+      END IF;
+
+      v_ids := v_ids || v_id;
+    END LOOP;
+
+  EXCEPTION
+    WHEN raise_exception THEN
+      IF v_error IS NULL THEN
+        RAISE;
+      END IF;
+
+      RETURN v_error;
+  END;
+
+  v_ids := v_ids || ARRAY(
+    SELECT (e.value ->> 'id')::BIGINT FROM jsonb_array_elements(p_status_changes) AS e(value)
+  );
+
+  SELECT COALESCE(jsonb_agg(to_jsonb(a) ORDER BY array_position(v_ids, a.id)), '[]'::JSONB)
+  INTO v_appointments
+  FROM appointments AS a
+  WHERE a.id = ANY(v_ids);
+
+  RETURN jsonb_build_object('appointments', v_appointments);
+END;
+$$;
@@ -0,0 +1,216 @@
+/*
+  [Credit ledger functions]
+  1) Called by the server through supabase.rpc (see app/utils/credit_transaction.py)
+  2) Each function is ONE transaction: the balance check, the balance change
+     and the credit_transactions row either all happen, or none of them do
+  3) Balances change as credit_balance = credit_balance + delta (never a value read earlier),
+     and rows are locked until commit, so concurrent bookings cannot lose updates
+
+  4) Paste this file into Supabase's SQL editor (safe to re-run)
+*/
+
+
+/*
+  [set_appointment_credits]
+  1) Sets how many credits an appointment has paid, charging or refunding the difference
+  2) p_payment_status is 'Paid' for credit payments, 'Pending' for card/cash
+  3) Returns { "credits_paid", "amount", "credit_balance" }, or { "error": "insufficient_credits" }
+     (nothing is changed in that case)
+*/
+
+CREATE OR REPLACE FUNCTION set_appointment_credits(
+  p_appointment_id BIGINT,
+  p_credits_paid INTEGER,
+  p_payment_status TEXT,
+  p_is_new BOOLEAN DEFAULT FALSE
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_customer_id BIGINT;
+  v_previous_credits_paid INTEGER;
+  v_diff INTEGER;
+  v_balance INTEGER;
+BEGIN
+  -- Lock the appointment, so concurrent updates to it apply one after another
+  SELECT customer_id, COALESCE(credits_paid, 0)
+  INTO v_customer_id, v_previous_credits_paid
+  FROM appointments
+  WHERE id = p_appointment_id
+  FOR UPDATE;
+
+  IF NOT FOUND THEN
+    RETURN jsonb_build_object('error', 'appointment_not_found');
+  END IF;
+
+  v_diff := p_credits_paid - v_previous_credits_paid;
+
+  IF v_diff <> 0 THEN
+    -- Funds check and deduction (or refund) in one statement
+    UPDATE customers
+    SET credit_balance = credit_balance - v_diff
+    WHERE id = v_customer_id AND credit_balance - v_diff >= 0
+    RETURNING credit_balance INTO v_balance;
+
+    IF NOT FOUND THEN
+      RETURN jsonb_build_object('error', 'insufficient_credits');
+    END IF;
+
+    INSERT INTO credit_transactions (customer_id, appointment_id, amount, type, description)
+    VALUES (
+      v_customer_id,
+      p_appointment_id,
+      -v_diff, -- Negative for credits used, positive for credits added
+      CASE WHEN v_diff > 0 THEN 'usage' ELSE 'refund' END,
+      CASE
+        WHEN v_diff > 0 AND p_is_new THEN format('Used %s credits for new appointment', p_credits_paid)
+        WHEN v_diff > 0 THEN format('Extra %s credits used for updated appointment', v_diff)
+        WHEN p_payment_status = 'Pending' THEN format('Refunded %s credits after switching to card/cash payment', -v_diff)
+        ELSE format('Refunded %s credits after service change', -v_diff)
+      END
+    );
+  END IF;
+
+  UPDATE appointments
+  SET credits_paid = p_credits_paid, payment_status = p_payment_status
+  WHERE id = p_appointment_id;
+
+  RETURN jsonb_build_object(
+    'credits_paid', p_credits_paid,
+    'amount', -v_diff,
+    'credit_balance', v_balance
+  );
+END;
+$$;
+
+
+/*
+  [upsert_appointment_with_credits]
+  1) Creates (no id) or updates an appointment, then charges or refunds its credits,
+     in ONE transaction: an appointment is never stored without being charged
+  2) p_appointment: the appointment row (snake_case)
+     credits_paid / payment_status are what the appointment should end up with
+     Fields missing from the row (eg: notes) are left as they are on update
+  3) Returns the stored appointment row, { "error": "insufficient_credits" }
+     or { "error": "appointment_not_found" } (nothing is changed in both cases)
+*/
+
+CREATE OR REPLACE FUNCTION upsert_appointment_with_credits(p_appointment JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_row appointments%ROWTYPE;
+  v_id BIGINT;
+  v_credits JSONB;
+  v_error JSONB;
+  v_appointment JSONB;
+BEGIN
+  v_row := jsonb_populate_record(NULL::appointments, p_appointment);
+
+  -- Changes made in this block are rolled back if it raises
+  BEGIN
+    IF v_row.id IS NULL THEN
+      INSERT INTO appointments (
+        customer_id, staff_id, service_id, outlet_id, start_time, end_time,
+        payment_method, payment_status, credits_paid, cash_paid, notes, status
+      )
+      VALUES (
+        v_row.customer_id, v_row.staff_id, v_row.service_id, v_row.outlet_id,
+        v_row.start_time, v_row.end_time, v_row.payment_method,
+        v_row.payment_status, 0, v_row.cash_paid, v_row.notes, v_row.status
+      )
+      RETURNING id INTO v_id;
+    ELSE
+      UPDATE appointments AS a
+      SET
+        customer_id = v_row.customer_id,
+        staff_id = v_row.staff_id,
+        service_id = v_row.service_id,
+        outlet_id = v_row.outlet_id,
+        start_time = v_row.start_time,
+        end_time = v_row.end_time,
+        payment_method = v_row.payment_method,
+        cash_paid = v_row.cash_paid,
+        notes = CASE WHEN p_appointment ? 'notes' THEN v_row.notes ELSE a.notes END,
+        status = v_row.status
+      WHERE a.id = v_row.id
+      RETURNING a.id INTO v_id;
+
+      IF NOT FOUND THEN
+        v_error := jsonb_build_object('error', 'appointment_not_found');
+        RAISE EXCEPTION 'appointment_not_found';
+      END IF;
+    END IF;
+
+    v_credits := set_appointment_credits(
+      v_id,
+      v_row.credits_paid,
+      v_row.payment_status::TEXT,
+      v_row.id IS NULL
+    );
+
+    IF v_credits ? 'error' THEN
+      v_error := v_credits;
+      RAISE EXCEPTION '%', v_credits ->> 'error';
+    END IF;
+
+  EXCEPTION
+    WHEN raise_exception THEN
+      IF v_error IS NULL THEN
+        RAISE;
+      END IF;
+
+      RETURN v_error;
+  END;
+
+  SELECT to_jsonb(a) INTO v_appointment
+  FROM appointments AS a
+  WHERE a.id = v_id;
+
+  RETURN v_appointment;
+END;
+$$;
+
+
+/*
+  [delete_appointment_with_refund]
+  1) Deletes an appointment, refunding the credits it paid (if any)
+  2) Returns the deleted appointment row, or NULL if there was none
+*/
+
+CREATE OR REPLACE FUNCTION delete_appointment_with_refund(p_appointment_id BIGINT)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_appointment appointments%ROWTYPE;
+BEGIN
+  DELETE FROM appointments
+  WHERE id = p_appointment_id
+  RETURNING * INTO v_appointment;
+
+  IF NOT FOUND THEN
+    RETURN NULL;
+  END IF;
+
+  IF v_appointment.payment_method = 'Credits' AND v_appointment.credits_paid > 0 THEN
+    UPDATE customers
+    SET credit_balance = credit_balance + v_appointment.credits_paid
+    WHERE id = v_appointment.customer_id;
+
+    -- The appointment is gone, so the ledger row only names it in the description
+    INSERT INTO credit_transactions (customer_id, appointment_id, amount, type, description)
+    VALUES (
+      v_appointment.customer_id,
+      NULL,
+      v_appointment.credits_paid,
+      'refund',
+      format('Refunded %s credits for deleted appointment %s', v_appointment.credits_paid, p_appointment_id)
+    );
+  END IF;
+
+  RETURN to_jsonb(v_appointment);
+END;
+$$;
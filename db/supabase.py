@@ -1,7 +1,10 @@
+import asyncio
 import os
+from typing import Optional
 
+import httpx
 from dotenv import load_dotenv
-from supabase import AClient, acreate_client
+from supabase import AClient, AsyncClientOptions, acreate_client
 
 load_dotenv()
 
@@ -9,7 +12,84 @@ url: str = os.environ.get("SUPABASE_URL")
 key: str = os.environ.get("SUPABASE_KEY")
 
 
-# New method to prevent disconnects
-async def get_supabase_client():
-    supabase: AClient = await acreate_client(url, key)
-    return supabase
+"""
+    [Connection pool tuning]
+    1) All optional, the defaults are fine for a single render instance
+    2) Timeouts are in seconds
+"""
+
+POOL_MAX_CONNECTIONS = int(os.environ.get("SUPABASE_POOL_MAX_CONNECTIONS", "100"))
+POOL_MAX_KEEPALIVE = int(os.environ.get("SUPABASE_POOL_MAX_KEEPALIVE", "20"))
+POOL_KEEPALIVE_EXPIRY = float(os.environ.get("SUPABASE_POOL_KEEPALIVE_EXPIRY", "30"))
+
+CONNECT_TIMEOUT = float(os.environ.get("SUPABASE_CONNECT_TIMEOUT", "5"))
+REQUEST_TIMEOUT = float(os.environ.get("SUPABASE_REQUEST_TIMEOUT", "30"))
+
+# Retries only apply to failed connection attempts (never to sent requests)
+CONNECT_RETRIES = int(os.environ.get("SUPABASE_CONNECT_RETRIES", "2"))
+
+
+"""
+    [Shared client]
+    1) One AClient (and one httpx pool) per process, created in the app lifespan
+    2) Connections are kept warm across requests, so no TLS handshake per request
+    3) Stale keep-alive connections are dropped by the pool, and failed connects are retried
+    4) If the client was closed underneath us, it is rebuilt on the next request
+"""
+
+_client: Optional[AClient] = None
+_http_client: Optional[httpx.AsyncClient] = None
+_client_lock = asyncio.Lock()
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    # The pool lives in the transport: httpx ignores the client's limits= when given one
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        retries=CONNECT_RETRIES,
+        limits=httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+    return httpx.AsyncClient(
+        follow_redirects=True,
+        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+        transport=transport,
+    )
+
+
+async def init_supabase_client() -> AClient:
+    global _client, _http_client
+
+    async with _client_lock:
+        if _client is not None and not _http_client.is_closed:
+            return _client
+
+        _http_client = _build_http_client()
+        _client = await acreate_client(
+            url, key, options=AsyncClientOptions(httpx_client=_http_client)
+        )
+
+        return _client
+
+
+async def close_supabase_client() -> None:
+    global _client, _http_client
+
+    async with _client_lock:
+        if _http_client is not None:
+            await _http_client.aclose()
+
+        _client = None
+        _http_client = None
+
+
+# Dependency injected into every route
+async def get_supabase_client() -> AClient:
+    if _client is None or _http_client.is_closed:
+        return await init_supabase_client()
+
+    return _client
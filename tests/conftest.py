@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+# db/supabase.py reads these on import, the tests never connect
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.blocked_time import blocked_time_index
+from app.utils.cache import reference_cache
+from app.utils.customer import customer_search_index
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # The caches are per process, so each test starts cold
+    reference_cache.clear()
+    blocked_time_index.clear()
+    customer_search_index.clear()
+    yield
@@ -0,0 +1,265 @@
+import asyncio
+import copy
+import itertools
+import re
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+"""
+    [Fake supabase client]
+    1) An in-memory stand-in for the AClient query builder, for the filters the routes use
+    2) Every executed query is recorded in client.calls as (table, operation)
+    3) DB functions (supabase.rpc) are Python callables registered in client.rpcs
+"""
+
+Row = Dict[str, Any]
+Filter = Callable[[Row], bool]
+
+# or_() parts: and(...), x.in.(...) or a plain x.op.value
+OR_PART_PATTERN = re.compile(r"and\([^)]*\)|\w+\.in\.\([^)]*\)|[^,]+")
+CONDITION_PATTERN = re.compile(r"(\w+)\.(\w+)\.(.*)")
+
+
+def _compare(value: Any, other: Any) -> Tuple[Any, Any]:
+    # Ints compare as ints, everything else (dates, times) as ISO strings
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value, int(other)
+    return str(value), str(other)
+
+
+def _condition(part: str) -> Filter:
+    column, op, value = CONDITION_PATTERN.match(part).groups()
+    value = value.strip('"')
+
+    def check(row: Row) -> bool:
+        current = row.get(column)
+
+        if op == "is":
+            return current is None if value == "null" else current == value
+        if op == "in":
+            return str(current) in value.strip("()").split(",")
+        if op == "ilike":
+            return (
+                current is not None and value.strip("%").lower() in str(current).lower()
+            )
+        if current is None:
+            return False
+        if op == "eq":
+            return str(current) == value
+
+        current, value_ = _compare(current, value)
+        return {
+            "gt": current > value_,
+            "gte": current >= value_,
+            "lt": current < value_,
+            "lte": current <= value_,
+        }[op]
+
+    return check
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeSupabase", table: str):
+        self.client = client
+        self.table = table
+        self.operation = "select"
+        self.payload: Any = None
+        self.columns = "*"
+        self.filters: List[Filter] = []
+        self.orders: List[Tuple[str, bool]] = []
+        self.row_limit: Optional[int] = None
+        self.mode: Optional[str] = None  # "single" / "maybe_single"
+
+    # [Operations]
+    def select(self, columns: str = "*", count: Optional[str] = None):
+        self.columns = columns
+        return self
+
+    def insert(self, payload: Any):
+        self.operation, self.payload = "insert", payload
+        return self
+
+    def update(self, payload: Row):
+        self.operation, self.payload = "update", payload
+        return self
+
+    def delete(self):
+        self.operation = "delete"
+        return self
+
+    # [Filters]
+    def _filter(self, check: Filter):
+        self.filters.append(check)
+        return self
+
+    def eq(self, column: str, value: Any):
+        return self._filter(lambda row: str(row.get(column)) == str(value))
+
+    def neq(self, column: str, value: Any):
+        return self._filter(lambda row: str(row.get(column)) != str(value))
+
+    def in_(self, column: str, values: List[Any]):
+        values = {str(value) for value in values}
+        return self._filter(lambda row: str(row.get(column)) in values)
+
+    def gt(self, column: str, value: Any):
+        return self._filter(_condition(f"{column}.gt.{value}"))
+
+    def gte(self, column: str, value: Any):
+        return self._filter(_condition(f"{column}.gte.{value}"))
+
+    def lt(self, column: str, value: Any):
+        return self._filter(_condition(f"{column}.lt.{value}"))
+
+    def lte(self, column: str, value: Any):
+        return self._filter(_condition(f"{column}.lte.{value}"))
+
+    def or_(self, expression: str):
+        checks: List[Filter] = []
+
+        for part in OR_PART_PATTERN.findall(expression):
+            if part.startswith("and("):
+                inner = [_condition(item) for item in part[4:-1].split(",")]
+                checks.append(lambda row, inner=inner: all(c(row) for c in inner))
+            else:
+                checks.append(_condition(part))
+
+        return self._filter(lambda row: any(check(row) for check in checks))
+
+    # [Modifiers]
+    def order(self, column: str, desc: bool = False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count: int):
+        self.row_limit = count
+        return self
+
+    def single(self):
+        self.mode = "single"
+        return self
+
+    def maybe_single(self):
+        self.mode = "maybe_single"
+        return self
+
+    def _matching_rows(self) -> List[Row]:
+        rows = [
+            row
+            for row in self.client.tables.setdefault(self.table, [])
+            if all(check(row) for check in self.filters)
+        ]
+
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda row: row.get(column), reverse=desc)
+
+        if self.row_limit is not None:
+            rows = rows[: self.row_limit]
+
+        return rows
+
+    def _project(self, row: Row) -> Row:
+        row = copy.deepcopy(row)
+
+        # Embedded link tables, eg: "*, staff_outlet(outlet_id)"
+        for relation in re.findall(r"(\w+)\([^)]*\)", self.columns):
+            column = self.table[:-1] + "_id"  # staffs -> staff_id
+            row[relation] = [
+                {"outlet_id": link["outlet_id"]}
+                for link in self.client.tables.get(relation, [])
+                if link[column] == row["id"]
+            ]
+
+        if self.columns.replace(" ", "").split(",")[0] == "*":
+            return row
+
+        return {
+            column.strip(): row.get(column.strip())
+            for column in self.columns.split(",")
+        }
+
+    async def execute(self):
+        self.client.calls.append((self.table, self.operation))
+        table = self.client.tables.setdefault(self.table, [])
+
+        if self.operation == "select":
+            data = [self._project(row) for row in self._matching_rows()]
+
+        elif self.operation == "insert":
+            items = self.payload if isinstance(self.payload, list) else [self.payload]
+            data = []
+            for item in items:
+                row = {"id": next(self.client.ids), **copy.deepcopy(item)}
+                table.append(row)
+                data.append(copy.deepcopy(row))
+
+        elif self.operation == "update":
+            data = []
+            for row in self._matching_rows():
+                row.update(copy.deepcopy(self.payload))
+                data.append(copy.deepcopy(row))
+
+        else:
+            deleted = self._matching_rows()
+            self.client.tables[self.table] = [
+                row for row in table if row not in deleted
+            ]
+            data = copy.deepcopy(deleted)
+
+        if self.mode == "single":
+            if len(data) != 1:
+                raise Exception("JSON object requested, multiple (or no) rows returned")
+            data = data[0]
+
+        elif self.mode == "maybe_single":
+            if not data:
+                return None
+            data = data[0]
+
+        return SimpleNamespace(data=data, count=None)
+
+
+class FakeRpc:
+    def __init__(self, client: "FakeSupabase", function: str, params: Row):
+        self.client = client
+        self.function = function
+        self.params = params
+
+    async def execute(self):
+        self.client.calls.append((self.function, "rpc"))
+        return SimpleNamespace(data=self.client.rpcs[self.function](self.params))
+
+
+class FakeSupabase:
+    def __init__(self, tables: Optional[Dict[str, List[Row]]] = None):
+        self.tables: Dict[str, List[Row]] = copy.deepcopy(tables or {})
+        self.rpcs: Dict[str, Callable[[Row], Any]] = {}
+        self.calls: List[Tuple[str, str]] = []
+        self.ids = itertools.count(1000)
+
+    def from_(self, table: str) -> FakeQuery:
+        return FakeQuery(self, table)
+
+    table = from_
+
+    def rpc(self, function: str, params: Optional[Row] = None) -> FakeRpc:
+        return FakeRpc(self, function, params or {})
+
+
+class GatedSupabase(FakeSupabase):
+    # Query results are held until the gate (when set) opens,
+    # like a response still in flight while other requests write
+    gate: Optional[asyncio.Event] = None
+
+    def from_(self, table: str) -> FakeQuery:
+        query = super().from_(table)
+        execute, gate = query.execute, self.gate
+
+        async def gated_execute():
+            result = await execute()
+            if gate is not None:
+                await gate.wait()
+            return result
+
+        query.execute = gated_execute
+        return query
@@ -0,0 +1,138 @@
+import copy
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from db.supabase import get_supabase_client
+from tests.fake_supabase import FakeSupabase
+
+TABLES = {
+    "staffs": [
+        {
+            "id": 1,
+            "first_name": "Ann",
+            "last_name": "Tan",
+            "email": "ann@kosme.com",
+            "phone": "91234567",
+            "role": "Therapist",
+            "active": True,
+            "bookable": True,
+        },
+    ],
+    "staff_outlet": [{"staff_id": 1, "outlet_id": 1}],
+    "customers": [
+        {
+            "id": 1,
+            "first_name": "Cat",
+            "last_name": "Lee",
+            "email": "cat@mail.com",
+            "phone": "98765432",
+            "birthday": None,
+            "membership_type": None,
+            "membership_status": "Active",
+            "preferred_therapist_id": None,
+            "preferred_outlet_id": None,
+            "allergies": [],
+            "reminders": "Email + SMS",
+            "credit_balance": 1,
+            "created_at": "2025-01-01T00:00:00+00:00",
+        },
+    ],
+    "services": [{"id": 1, "name": "Facial", "credit_cost": 2}],
+    "shifts": [],
+    "time_offs": [],
+    "blocked_times": [],
+    "appointments": [],
+    "credit_transactions": [],
+}
+
+APPOINTMENT = {
+    "customerId": 1,
+    "staffId": 1,
+    "serviceId": 1,
+    "outletId": 1,
+    "startTime": "2025-03-03T12:00:00",
+    "endTime": "2025-03-03T13:00:00",
+    "paymentMethod": "Credits",
+    "paymentStatus": "Pending",
+    "creditsPaid": 0,
+    "cashPaid": 0,
+    "status": "Booked",
+}
+
+
+def upsert_appointment_with_credits(supabase: FakeSupabase):
+    # Same behaviour as the function in db/credit_ledger.sql: all or nothing
+    def function(params):
+        snapshot = copy.deepcopy(supabase.tables)
+        row = dict(params["p_appointment"])
+        appointments = supabase.tables["appointments"]
+
+        if row.get("id"):
+            stored = next((a for a in appointments if a["id"] == row["id"]), None)
+            if stored is None:
+                return {"error": "appointment_not_found"}
+            charged = row["credits_paid"] - stored["credits_paid"]
+        else:
+            stored = {
+                "id": next(supabase.ids),
+                "credits_paid": 0,
+                "notes": None,
+                "created_at": "2025-03-01T00:00:00+00:00",
+            }
+            appointments.append(stored)
+            charged = row["credits_paid"]
+
+        stored.update(row)
+
+        customer = next(
+            c for c in supabase.tables["customers"] if c["id"] == row["customer_id"]
+        )
+        if customer["credit_balance"] < charged:
+            supabase.tables = snapshot
+            return {"error": "insufficient_credits"}
+
+        customer["credit_balance"] -= charged
+        return copy.deepcopy(stored)
+
+    return function
+
+
+@pytest.fixture
+def supabase():
+    client = FakeSupabase(TABLES)
+    client.rpcs["upsert_appointment_with_credits"] = upsert_appointment_with_credits(
+        client
+    )
+
+    async def get_fake_client():
+        return client
+
+    app.dependency_overrides[get_supabase_client] = get_fake_client
+    yield client
+    app.dependency_overrides.clear()
+
+
+def test_create_with_insufficient_credits_stores_nothing(supabase):
+    response = TestClient(app).put("/api/appointments", json=APPOINTMENT)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Insufficient credits for new appointment"
+
+    # The write only happens inside the DB function, which rolled back
+    assert ("appointments", "insert") not in supabase.calls
+    assert supabase.tables["appointments"] == []
+    assert supabase.tables["customers"][0]["credit_balance"] == 1
+
+
+def test_create_with_enough_credits_is_charged(supabase):
+    supabase.tables["customers"][0]["credit_balance"] = 5
+
+    response = TestClient(app).put("/api/appointments", json=APPOINTMENT)
+
+    assert response.status_code == 201
+    assert response.json()["creditsPaid"] == 2
+    assert response.json()["paymentStatus"] == "Paid"
+    assert len(supabase.tables["appointments"]) == 1
+    assert supabase.tables["customers"][0]["credit_balance"] == 3
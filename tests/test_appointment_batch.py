@@ -0,0 +1,215 @@
+import copy
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from db.supabase import get_supabase_client
+from tests.fake_supabase import FakeSupabase
+
+
+def staff(staff_id: int, first_name: str) -> dict:
+    return {
+        "id": staff_id,
+        "first_name": first_name,
+        "last_name": "Tan",
+        "email": f"{first_name.lower()}@kosme.com",
+        "phone": "91234567",
+        "role": "Therapist",
+        "active": True,
+        "bookable": True,
+    }
+
+
+def customer(customer_id: int, first_name: str, credit_balance: int) -> dict:
+    return {
+        "id": customer_id,
+        "first_name": first_name,
+        "last_name": "Lee",
+        "email": f"{first_name.lower()}@mail.com",
+        "phone": "98765432",
+        "credit_balance": credit_balance,
+    }
+
+
+def appointment(appointment_id: int, staff_id: int, customer_id: int, hour: int):
+    return {
+        "id": appointment_id,
+        "customer_id": customer_id,
+        "staff_id": staff_id,
+        "service_id": 1,
+        "outlet_id": 1,
+        "start_time": f"2025-03-03T{hour:02d}:00:00",
+        "end_time": f"2025-03-03T{hour + 1:02d}:00:00",
+        "payment_method": "Cash",
+        "payment_status": "Pending",
+        "credits_paid": 0,
+        "cash_paid": 0,
+        "notes": None,
+        "status": "Booked",
+        "created_at": "2025-03-01T00:00:00+00:00",
+    }
+
+
+# 2025-03-03 is a Monday, so staffs work the default 11:00-20:00 (no shifts)
+TABLES = {
+    "staffs": [staff(1, "Ann"), staff(2, "Bob")],
+    "staff_outlet": [{"staff_id": 1, "outlet_id": 1}, {"staff_id": 2, "outlet_id": 1}],
+    "customers": [customer(1, "Cat", 3), customer(2, "Dan", 0)],
+    "services": [{"id": 1, "name": "Facial", "credit_cost": 2}],
+    "shifts": [],
+    "time_offs": [],
+    "blocked_times": [],
+    "appointments": [appointment(1, 1, 1, 12), appointment(2, 2, 2, 14)],
+    "credit_transactions": [],
+}
+
+
+def upsert(staff_id: int, customer_id: int, hour: int, **fields) -> dict:
+    return {
+        "customerId": customer_id,
+        "staffId": staff_id,
+        "serviceId": 1,
+        "outletId": 1,
+        "startTime": f"2025-03-03T{hour:02d}:00:00",
+        "endTime": f"2025-03-03T{hour + 1:02d}:00:00",
+        "paymentMethod": "Cash",
+        "paymentStatus": "Pending",
+        "creditsPaid": 0,
+        "cashPaid": 0,
+        "status": "Booked",
+        **fields,
+    }
+
+
+def apply_appointment_batch(supabase: FakeSupabase):
+    # Same behaviour as the function in db/appointment_batch.sql: all or nothing
+    def function(params):
+        snapshot = copy.deepcopy(supabase.tables)
+        appointments = supabase.tables["appointments"]
+        customers = {c["id"]: c for c in supabase.tables["customers"]}
+        ids = []
+
+        for index, row in enumerate(params["p_upserts"]):
+            if row.get("id"):
+                stored = next(a for a in appointments if a["id"] == row["id"])
+            else:
+                stored = {**appointment(next(supabase.ids), 0, 0, 0), "credits_paid": 0}
+                appointments.append(stored)
+
+            charged = row["credits_paid"] - stored["credits_paid"]
+            stored.update(row)
+
+            customer = customers[row["customer_id"]]
+            if customer["credit_balance"] < charged:
+                supabase.tables = snapshot
+                return {"error": "insufficient_credits", "index": index}
+
+            customer["credit_balance"] -= charged
+            ids.append(stored["id"])
+
+        for change in params["p_status_changes"]:
+            stored = next(a for a in appointments if a["id"] == change["id"])
+            stored["status"] = change["status"]
+            ids.append(stored["id"])
+
+        return {
+            "appointments": [
+                copy.deepcopy(next(a for a in appointments if a["id"] == i))
+                for i in ids
+            ]
+        }
+
+    return function
+
+
+@pytest.fixture
+def supabase():
+    client = FakeSupabase(TABLES)
+    client.rpcs["apply_appointment_batch"] = apply_appointment_batch(client)
+
+    async def get_fake_client():
+        return client
+
+    app.dependency_overrides[get_supabase_client] = get_fake_client
+    yield client
+    app.dependency_overrides.clear()
+
+
+def put_batch(upserts=(), status_changes=()):
+    return TestClient(app).put(
+        "/api/appointments/batch",
+        json={"upserts": list(upserts), "statusChanges": list(status_changes)},
+    )
+
+
+def test_changes_in_the_same_batch_clash_with_each_other(supabase):
+    response = put_batch([upsert(1, 1, 15), upsert(1, 2, 15)])
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == (
+        "upserts[1]: Appointment 15:00-16:00 by staff Ann has clashing appointments."
+    )
+    assert ("apply_appointment_batch", "rpc") not in supabase.calls
+
+
+def test_customer_clash_across_staffs_in_the_same_batch(supabase):
+    response = put_batch([upsert(1, 1, 16), upsert(2, 1, 16)])
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == (
+        "upserts[1]: Appointment 16:00-17:00 by customer Cat has clashing appointments."
+    )
+
+
+def test_appointments_can_swap_slots(supabase):
+    response = put_batch(
+        [
+            upsert(1, 1, 14, id=1),  # Ann's 12:00 moves to Bob's 14:00
+            upsert(2, 2, 12, id=2),  # and Bob's 14:00 to 12:00
+        ]
+    )
+
+    assert response.status_code == 200
+    moved = {item["id"]: item["startTime"] for item in response.json()}
+    assert moved == {1: "2025-03-03T14:00:00", 2: "2025-03-03T12:00:00"}
+
+
+def test_status_change_errors_are_prefixed(supabase):
+    supabase.tables["appointments"][1]["status"] = "Cancelled"
+
+    # Un-cancelling Bob's 14:00, after a new 14:00 for Bob earlier in the batch
+    response = put_batch([upsert(2, 1, 14)], [{"id": 2, "status": "Booked"}])
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == (
+        "statusChanges[0]: Appointment 14:00-15:00 by staff Bob has clashing appointments."
+    )
+
+
+def test_batch_is_all_or_nothing(supabase):
+    before = copy.deepcopy(supabase.tables)
+
+    # Cat can pay for one 2-credit appointment, not two
+    response = put_batch(
+        [
+            upsert(1, 1, 16, paymentMethod="Credits"),
+            upsert(2, 1, 18, paymentMethod="Credits"),
+        ]
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == (
+        "upserts[1]: Insufficient credits for new appointment"
+    )
+    assert supabase.tables == before
+
+
+def test_uncancelling_for_a_deleted_staff_is_not_found(supabase):
+    supabase.tables["appointments"][1]["status"] = "Cancelled"
+    supabase.tables["staffs"] = [staff(1, "Ann")]
+
+    response = put_batch([], [{"id": 2, "status": "Booked"}])
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Staff not found"
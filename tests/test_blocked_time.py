@@ -0,0 +1,86 @@
+import asyncio
+
+from app.utils.blocked_time import BlockedTimeOccurrenceIndex
+from app.utils.general import TimeRange
+from tests.fake_supabase import FakeSupabase, GatedSupabase
+
+DATE = "2025-03-03"
+
+
+def blocked_time(blocked_time_id: int, title: str) -> dict:
+    return {
+        "id": blocked_time_id,
+        "staff_id": 1,
+        "title": title,
+        "start_date": DATE,
+        "from_time": "15:00:00",
+        "to_time": "16:00:00",
+        "frequency": "None",
+        "ends": "Never",
+        "ends_on_date": None,
+        "ends_after_occurrences": None,
+    }
+
+
+async def _titles(index, supabase, **kwargs) -> list:
+    found = await index.get_by_staffs_and_date([1], DATE, supabase, **kwargs)
+    return [item["title"] for item in found]
+
+
+def test_load_that_raced_a_write_is_not_stored():
+    async def scenario():
+        supabase = GatedSupabase({"blocked_times": [blocked_time(1, "Lunch")]})
+        index = BlockedTimeOccurrenceIndex()
+
+        # The load reads the table before the write below
+        supabase.gate = asyncio.Event()
+        load = asyncio.create_task(index.get_by_staffs_and_date([1], DATE, supabase))
+        await asyncio.sleep(0)
+
+        supabase.tables["blocked_times"] = [blocked_time(1, "Meeting")]
+        index.put(blocked_time(1, "Meeting"))
+
+        supabase.gate.set()
+        await load
+
+        supabase.gate = None
+        assert await _titles(index, supabase) == ["Meeting"]
+
+    asyncio.run(scenario())
+
+
+def test_validation_reads_rows_written_elsewhere():
+    async def scenario():
+        supabase = FakeSupabase({"blocked_times": [blocked_time(1, "Lunch")]})
+        index = BlockedTimeOccurrenceIndex()
+        assert await _titles(index, supabase) == ["Lunch"]
+
+        # Written by another worker process, so this index was not told
+        supabase.tables["blocked_times"].append(blocked_time(2, "Training"))
+
+        assert await _titles(index, supabase) == ["Lunch"]
+        assert await _titles(index, supabase, max_age_seconds=0) == [
+            "Lunch",
+            "Training",
+        ]
+
+    asyncio.run(scenario())
+
+
+def test_time_ranges_are_converted_when_indexed():
+    async def scenario():
+        supabase = FakeSupabase({"blocked_times": [blocked_time(1, "Lunch")]})
+        index = BlockedTimeOccurrenceIndex()
+        (row,) = await index.get_by_staffs_and_date([1], DATE, supabase)
+
+        assert index.get_time_range(row) == TimeRange(900, 960)
+
+        # A copy (or an older version) of the row is not the indexed one
+        assert index.get_time_range(dict(row)) is None
+
+        moved = {**row, "from_time": "09:00:00", "to_time": "09:30:00"}
+        index.put(moved)
+        assert index.get_time_range(moved) == TimeRange(540, 570)
+        assert index.get_time_range(row) is None
+
+    asyncio.run(scenario())
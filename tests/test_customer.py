@@ -0,0 +1,78 @@
+import asyncio
+
+from app.utils.customer import CustomerSearchIndex
+from tests.fake_supabase import FakeSupabase, GatedSupabase
+
+
+def customer(customer_id: int, first_name: str) -> dict:
+    return {
+        "id": customer_id,
+        "first_name": first_name,
+        "last_name": "Lee",
+        "email": f"{first_name.lower()}@mail.com",
+        "phone": f"+65 9123 000{customer_id}",
+    }
+
+
+async def _search_ids(index: CustomerSearchIndex, query: str, supabase) -> list:
+    return [found["id"] for found in await index.search(query, supabase)]
+
+
+def test_put_during_rebuild_is_kept():
+    async def scenario():
+        supabase = GatedSupabase(
+            {"customers": [customer(1, "Cat"), customer(2, "Dan")]}
+        )
+        index = CustomerSearchIndex()
+        assert await _search_ids(index, "cat", supabase) == [1]
+
+        # The rebuild loads the customers as they were before the write below
+        supabase.gate = asyncio.Event()
+        rebuild = asyncio.create_task(index._refresh(supabase))
+        await asyncio.sleep(0)
+
+        index.put(customer(1, "Cathy"))
+        index.remove(2)
+
+        supabase.gate.set()
+        await rebuild
+
+        assert await _search_ids(index, "cathy", supabase) == [1]
+        assert await _search_ids(index, "dan", supabase) == []
+
+    asyncio.run(scenario())
+
+
+def test_put_updates_loaded_index():
+    async def scenario():
+        supabase = FakeSupabase({"customers": [customer(1, "Cat")]})
+        index = CustomerSearchIndex()
+        assert await _search_ids(index, "cat", supabase) == [1]
+
+        index.put(customer(1, "Eve"))
+
+        assert await _search_ids(index, "cat", supabase) == []
+        assert await _search_ids(index, "eve", supabase) == [1]
+
+    asyncio.run(scenario())
+
+
+def test_search_returns_live_rows():
+    async def scenario():
+        supabase = FakeSupabase(
+            {"customers": [{**customer(1, "Cat"), "credit_balance": 10}]}
+        )
+        index = CustomerSearchIndex()
+        assert (await index.search("cat", supabase))[0]["credit_balance"] == 10
+
+        # Changed by the credit ledger, which does not update the index
+        supabase.tables["customers"][0]["credit_balance"] = 4
+
+        (found,) = await index.search("cat", supabase)
+        assert found["credit_balance"] == 4
+
+        # Deleted by another worker process
+        supabase.tables["customers"] = []
+        assert await index.search("cat", supabase) == []
+
+    asyncio.run(scenario())
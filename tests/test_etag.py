@@ -0,0 +1,35 @@
+from typing import List
+
+from pydantic import TypeAdapter
+from starlette.requests import Request
+
+from app.utils import etag
+from app.utils.etag import etag_response
+
+adapter = TypeAdapter(List[dict])
+
+
+def request(if_none_match: str = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "headers": headers})
+
+
+def test_memo_is_bounded(monkeypatch):
+    monkeypatch.setattr(etag, "ETAG_MAX_MEMOIZED_BODIES", 2)
+    monkeypatch.setattr(etag, "_rendered", etag.OrderedDict())
+
+    source = [{"id": 1}]
+    for outlet_id in range(5):
+        etag_response(request(), adapter, source, memo_key=("staffs", outlet_id))
+
+    assert list(etag._rendered) == [("staffs", 3), ("staffs", 4)]
+
+
+def test_matching_etag_is_not_modified():
+    first = etag_response(request(), adapter, [{"id": 1}])
+
+    again = etag_response(request(first.headers["etag"]), adapter, [{"id": 1}])
+    changed = etag_response(request(first.headers["etag"]), adapter, [{"id": 2}])
+
+    assert again.status_code == 304
+    assert changed.status_code == 200
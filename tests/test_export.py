@@ -0,0 +1,43 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routes import export
+from db.supabase import get_supabase_client
+from tests.fake_supabase import FakeSupabase
+
+APPOINTMENTS = [
+    {"id": appointment_id, "start_time": "2025-03-03T12:00:00", "notes": "Café"}
+    for appointment_id in range(1, 6)
+]
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    # Small pages, so the export spans several of them
+    monkeypatch.setattr(export, "EXPORT_PAGE_SIZE", 2)
+    client = FakeSupabase({"appointments": APPOINTMENTS})
+
+    async def get_fake_client():
+        return client
+
+    app.dependency_overrides[get_supabase_client] = get_fake_client
+    yield client
+    app.dependency_overrides.clear()
+
+
+def test_export_streams_every_row_as_ndjson(supabase):
+    response = TestClient(app).get("/api/export/appointments")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert [json.loads(line) for line in lines] == APPOINTMENTS
+
+
+def test_export_resumes_after_cursor(supabase):
+    response = TestClient(app).get("/api/export/appointments?cursor=3")
+
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [4, 5]
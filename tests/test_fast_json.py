@@ -0,0 +1,60 @@
+import json
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+from app.models.appointment.appointment import AppointmentResponse
+from app.models.customer import CustomerResponse
+from app.utils import fast_json
+from app.utils.fast_json import TrustedAdapter
+
+# As PostgREST returns them (timestamptz with an offset, fractional seconds trimmed)
+CUSTOMER = {
+    "id": 1,
+    "first_name": "Cat",
+    "last_name": "Lee",
+    "email": "cat@mail.com",
+    "phone": "98765432",
+    "birthday": "1990-01-01",
+    "membership_type": None,
+    "membership_status": "Active",
+    "preferred_therapist_id": None,
+    "preferred_outlet_id": None,
+    "allergies": ["Nuts"],
+    "reminders": "Email + SMS",
+    "credit_balance": 10,
+    "created_at": "2025-01-01T08:30:00.1+00:00",
+}
+
+APPOINTMENT = {
+    "id": 1,
+    "customer_id": 1,
+    "staff_id": 1,
+    "service_id": 1,
+    "outlet_id": 1,
+    "start_time": "2025-03-03T12:00:00",
+    "end_time": "2025-03-03T13:00:00",
+    "payment_method": "Cash",
+    "payment_status": "Pending",
+    "credits_paid": 0,
+    "cash_paid": 0,
+    "notes": None,
+    "status": "Booked",
+    "created_at": "2025-03-01T00:00:00+00:00",
+}
+
+
+@pytest.mark.parametrize(
+    "model, row", [(CustomerResponse, CUSTOMER), (AppointmentResponse, APPOINTMENT)]
+)
+@pytest.mark.parametrize("has_orjson", [True, False])
+def test_fast_path_matches_response_model(monkeypatch, model, row, has_orjson):
+    if not has_orjson:
+        monkeypatch.setattr(fast_json, "orjson", None)
+
+    validated = TypeAdapter(List[model])
+    expected = validated.dump_json(validated.validate_python([row]), by_alias=True)
+
+    assert TrustedAdapter(model).dump_json([row]) == expected
+    assert json.loads(expected)[0]["createdAt"].endswith("Z")
@@ -0,0 +1,64 @@
+import asyncio
+import base64
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.pagination import _decode_cursor, _encode_cursor, _get_page
+from tests.fake_supabase import FakeSupabase
+
+KEYS = ("start_time", "id")
+
+
+def raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def test_cursor_round_trip():
+    cursor = _encode_cursor(["2025-03-03T12:00:00+00:00", 7])
+
+    assert _decode_cursor(cursor, KEYS) == ["2025-03-03T12:00:00+00:00", 7]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        raw_cursor({"id": 1}),
+        raw_cursor(["2025-03-03T12:00:00"]),
+        raw_cursor(["2025-03-03T12:00:00", "7"]),
+        raw_cursor(["2025-03-03T12:00:00", "7),id.gt.(0"]),
+        raw_cursor(["2025-03-03T12:00:00", True]),
+        raw_cursor(["2025-03-03T12:00:00", 7.5]),
+        raw_cursor(['2025-03-03",id.gt."0', 7]),
+        raw_cursor([20250303, 7]),
+        raw_cursor([None, 7]),
+    ],
+)
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        _decode_cursor(cursor, KEYS)
+
+    assert error.value.status_code == 400
+    assert error.value.detail == "Invalid cursor"
+
+
+def test_filter_uses_parsed_values():
+    supabase = FakeSupabase(
+        {
+            "appointments": [
+                {"id": 1, "start_time": "2025-03-03T09:00:00"},
+                {"id": 2, "start_time": "2025-03-03T10:00:00"},
+                {"id": 3, "start_time": "2025-03-03T10:00:00"},
+            ]
+        }
+    )
+    # A valid timestamp in another ISO spelling is normalized before filtering
+    cursor = raw_cursor(["2025-03-03 10:00", 2])
+
+    page = asyncio.run(
+        _get_page(supabase.from_("appointments").select("*"), KEYS, 10, cursor)
+    )
+
+    assert [row["id"] for row in page["items"]] == [3]
@@ -0,0 +1,38 @@
+import asyncio
+
+from app.utils.staff import _get_staff, _get_staff_directory
+from tests.fake_supabase import FakeSupabase
+
+STAFF = {"id": 1, "first_name": "Ann"}
+
+
+def test_unknown_staff_does_not_reload_directory():
+    supabase = FakeSupabase({"staffs": [STAFF], "staff_outlet": []})
+
+    async def scenario():
+        directory = await _get_staff_directory(supabase)
+
+        assert await _get_staff(999, supabase) is None
+        assert await _get_staff(999, supabase) is None
+
+        # Still the same cached directory, the misses were single-row lookups
+        assert await _get_staff_directory(supabase) is directory
+
+    asyncio.run(scenario())
+
+
+def test_staff_created_elsewhere_reloads_directory():
+    supabase = FakeSupabase({"staffs": [STAFF], "staff_outlet": []})
+
+    async def scenario():
+        await _get_staff(1, supabase)
+
+        # Created by another worker process
+        supabase.tables["staffs"].append({"id": 2, "first_name": "Bob"})
+        supabase.tables["staff_outlet"].append({"staff_id": 2, "outlet_id": 1})
+
+        staff = await _get_staff(2, supabase)
+        assert staff["first_name"] == "Bob"
+        assert staff["locations"] == [1]
+
+    asyncio.run(scenario())
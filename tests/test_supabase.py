@@ -0,0 +1,20 @@
+import asyncio
+
+from db import supabase
+
+
+def test_pool_limits_reach_the_transport(monkeypatch):
+    monkeypatch.setattr(supabase, "POOL_MAX_CONNECTIONS", 7)
+    monkeypatch.setattr(supabase, "POOL_MAX_KEEPALIVE", 3)
+    monkeypatch.setattr(supabase, "POOL_KEEPALIVE_EXPIRY", 12.5)
+
+    client = supabase._build_http_client()
+    pool = client._transport._pool
+
+    try:
+        assert pool._max_connections == 7
+        assert pool._max_keepalive_connections == 3
+        assert pool._keepalive_expiry == 12.5
+        assert pool._http2 is True
+    finally:
+        asyncio.run(client.aclose())